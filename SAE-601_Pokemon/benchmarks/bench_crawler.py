@@ -0,0 +1,131 @@
+from contextlib import redirect_stdout
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+data_collection_dir = os.path.join(os.path.dirname(benchmarks_dir), "data_collection")
+replay_server_script = os.path.join(benchmarks_dir, "replay_server.py")
+
+sys.path.insert(0, data_collection_dir)
+from crawl_metrics import merge_histograms
+
+# Page types of the card catalog, the other page types belong to the tournaments stage
+card_page_types = ("card_index", "card_set", "card")
+
+# Child process: run data_collection/main.py's main() against the replay server from an empty working
+# directory (no cache, no output) and print the measurements as JSON
+def run_crawl(port: int, cards_rate: float, output_format: str):
+    os.chdir(tempfile.mkdtemp(prefix="bench_crawl_"))
+    import main
+
+    main.base_url = f"http://127.0.0.1:{port}"
+    main.cards_base_url = main.base_url
+    main.cards_rate_limit = cards_rate
+    main.cards_burst = int(cards_rate)
+    main.output_format = output_format
+
+    with redirect_stdout(io.StringIO()):
+        asyncio.run(main.main())
+
+    summary = main.metrics.summary()
+    with open(main.cards_output_file, encoding="utf-8") as f:
+        nb_cards = len(json.load(f))
+
+    fetch_latency = merge_histograms(main.metrics.request_latency.values())
+    parse_time = merge_histograms(main.metrics.parse_time.values())
+    nb_pages = fetch_latency.count
+    nb_card_pages = sum(page["requests"]["count"] for page_type, page in summary["pages"].items() if page_type in card_page_types)
+    print(json.dumps({
+        "tournaments": main.metrics.counters["tournaments_extracted"],
+        "cards": nb_cards,
+        "pages": nb_pages,
+        "tournament_pages_per_s": (nb_pages - nb_card_pages) / summary["stages_s"]["tournaments"],
+        "card_pages_per_s": nb_card_pages / summary["stages_s"]["cards"],
+        "fetch_p50_ms": 1000 * fetch_latency.quantile(0.50),
+        "fetch_p99_ms": 1000 * fetch_latency.quantile(0.99),
+        "parse_total_s": parse_time.sum,
+        "parse_p50_ms": 1000 * parse_time.quantile(0.50),
+        "downloaded_mb": sum(main.metrics.bytes_downloaded.values()) / 1024 ** 2,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "parser_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "metrics": summary,
+    }))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Replay server did not start on port {port}")
+
+# Start a replay server at the given scale and measure one crawl against it
+def bench_scale(scale: int, args) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, replay_server_script, "--port", str(port), "--scale", str(scale),
+         "--latency", str(args.latency), "--jitter", str(args.jitter), "--error-rate", str(args.error_rate)],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        crawl = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--crawl", "--port", str(port), "--cards-rate", str(args.cards_rate), "--output-format", args.output_format],
+            capture_output=True, text=True, check=True
+        )
+        return json.loads(crawl.stdout.strip().splitlines()[-1])
+    finally:
+        server.terminate()
+        server.wait()
+
+# (result key, header, format) of the printed table
+columns = [
+    ("scale", "scale", "{:>5}"), ("tournaments", "tournaments", "{:>11}"), ("cards", "cards", "{:>6}"),
+    ("pages", "pages", "{:>6}"), ("tournament_pages_per_s", "t.pages/s", "{:>10.1f}"), ("card_pages_per_s", "c.pages/s", "{:>10.1f}"),
+    ("fetch_p50_ms", "p50 ms", "{:>8.1f}"), ("fetch_p99_ms", "p99 ms", "{:>8.1f}"), ("parse_total_s", "parse s", "{:>8.2f}"),
+    ("parse_p50_ms", "parse ms", "{:>8.2f}"), ("peak_rss_mb", "rss MB", "{:>8.1f}"), ("parser_peak_rss_mb", "pool MB", "{:>8.1f}"),
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the data_collection crawler against the local replay server")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4], help="scale factors (completed tournaments pages) to measure")
+    parser.add_argument("--latency", type=float, default=20.0, help="mean latency of the replay server (ms)")
+    parser.add_argument("--jitter", type=float, default=5.0, help="latency standard deviation (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 429/503 responses")
+    parser.add_argument("--cards-rate", type=float, default=200.0, help="card scraper rate limit (requests/s)")
+    parser.add_argument("--output-format", default="json", help="tournaments output format of the crawler (json, ndjson, parquet)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--crawl", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.crawl:
+        run_crawl(args.port, args.cards_rate, args.output_format)
+        sys.exit(0)
+
+    print(" ".join(header.rjust(len(fmt.format(0))) for _, header, fmt in columns))
+    results = []
+    for scale in args.scales:
+        result = {"scale": scale, **bench_scale(scale, args)}
+        results.append(result)
+        print(" ".join(fmt.format(result[key]) for key, _, fmt in columns), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
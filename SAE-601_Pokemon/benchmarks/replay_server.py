@@ -0,0 +1,209 @@
+from aiohttp import web
+from dataclasses import dataclass
+from string import Template
+import argparse
+import asyncio
+import os
+import random
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Size of the replayed site for a scale factor, and the network conditions to simulate
+@dataclass
+class ReplayConfig:
+    scale: int = 1
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    tournaments_per_page: int = 10
+    players_per_tournament: int = 32
+    swiss_rounds: int = 5
+    cards_per_set: int = 40
+
+    @property
+    def nb_pages(self):
+        return self.scale
+
+    @property
+    def nb_sets(self):
+        return 2 * self.scale
+
+# Split each fixture around its <!-- repeat --> block, once at start-up
+def load_fixtures():
+    fixtures = {}
+    for filename in os.listdir(fixtures_dir):
+        with open(os.path.join(fixtures_dir, filename), encoding="utf-8") as f:
+            html = f.read()
+
+        head, rest = html.split("<!-- repeat -->")
+        block, tail = rest.split("<!-- /repeat -->")
+        fixtures[filename.removesuffix(".html")] = (Template(head), Template(block), Template(tail))
+
+    return fixtures
+
+fixtures = load_fixtures()
+
+# Render a fixture with its repeated block filled once per row
+def render(fixture: str, rows: list[dict], **fields) -> str:
+    head, block, tail = fixtures[fixture]
+    return head.substitute(fields) + "".join(block.substitute(fields, **row) for row in rows) + tail.substitute(fields)
+
+card_names = ["Pikachu ex", "Mewtwo ex", "Charizard ex", "Gardevoir", "Ralts", "Kirlia", "Misty", "Starmie ex", "Staryu", "Moltres ex", "Articuno ex", "Greninja", "Froakie", "Frogadier", "Zapdos ex", "Dialga ex", "Arceus ex", "Pachirisu ex"]
+
+def tournament_id(page: int, index: int) -> str:
+    return f"bench{page:04d}x{index:02d}"
+
+def tournament_list_page(config: ReplayConfig, page: int) -> str:
+    rows = []
+    for index in range(config.tournaments_per_page):
+        day = (page * config.tournaments_per_page + index) % 28 + 1
+        rows.append({
+            "id": tournament_id(page, index),
+            "name": f"Bench Cup {page}-{index}",
+            "date": f"2025-03-{day:02d}T18:00:00.000Z",
+            "short_date": f"{day:02d} Mar 25",
+            "organizer": f"Organizer {index % 5}",
+            "players": config.players_per_tournament,
+        })
+
+    return render("tournament_list", rows, current=page, max=config.nb_pages)
+
+def standings_page(config: ReplayConfig, tournament: str) -> str:
+    rows = []
+    for placing in range(1, config.players_per_tournament + 1):
+        player_id = f"p{placing}"
+        decklist_link = f'<a href="/tournament/{tournament}/player/{player_id}/decklist">List</a>' if placing % 8 else ""
+        rows.append({
+            "player_id": player_id,
+            "name": f"Player {placing}",
+            "placing": placing,
+            "country": ["FR", "US", "JP", "DE"][placing % 4],
+            "points": 3 * (config.swiss_rounds - placing % config.swiss_rounds),
+            "record": f"{config.swiss_rounds - placing % config.swiss_rounds} - {placing % config.swiss_rounds} - 0",
+            "archetype": card_names[placing % len(card_names)].split(" ")[0].lower(),
+            "decklist_link": decklist_link,
+        })
+
+    return render("standings", rows, tournament_id=tournament)
+
+def decklist_page(config: ReplayConfig, tournament: str, player_id: str) -> str:
+    rand = random.Random(f"{tournament}/{player_id}")
+    rows = []
+    for name in rand.sample(card_names, 7):
+        rows.append({
+            "set": "A1",
+            "number": card_names.index(name) + 1,
+            "count": rand.choice([1, 2]),
+            "card_name": name,
+        })
+
+    return render("decklist", rows, tournament_id=tournament, player_id=player_id, nb_pokemon=sum(row["count"] for row in rows))
+
+def rounds_nav(tournament: str, config: ReplayConfig) -> str:
+    links = [f'<a href="/tournament/{tournament}/pairings?round={r}">{r}</a>' for r in range(1, config.swiss_rounds + 1)]
+    return "".join(links) + f'<a href="/tournament/{tournament}/pairings">Top</a>'
+
+def match_rows(players: list[int], rand: random.Random) -> list[dict]:
+    rows = []
+    for table, index in enumerate(range(0, len(players) - 1, 2), start=1):
+        winner_first = rand.random() < 0.5
+        rows.append({
+            "table": table,
+            "p1": f"p{players[index]}",
+            "p2": f"p{players[index + 1]}",
+            "p1_score": 2 if winner_first else rand.choice([0, 1]),
+            "p2_score": rand.choice([0, 1]) if winner_first else 2,
+        })
+    return rows
+
+# Swiss rounds are table pairings, the last (default) page is the top 8 bracket
+def pairings_page(config: ReplayConfig, tournament: str, round_number: int | None) -> str:
+    rand = random.Random(f"{tournament}/{round_number}")
+    if round_number is None:
+        rows = match_rows(list(range(1, 9)), rand)
+        return render("pairings_bracket", rows, tournament_id=tournament, rounds_nav=rounds_nav(tournament, config))
+
+    players = list(range(1, config.players_per_tournament + 1))
+    rand.shuffle(players)
+    return render("pairings_table", match_rows(players, rand), tournament_id=tournament, round=round_number, rounds_nav=rounds_nav(tournament, config))
+
+def card_set_name(index: int) -> str:
+    return f"B{index}"
+
+def card_index_page(config: ReplayConfig) -> str:
+    rows = [{"set": card_set_name(index), "nb_cards": config.cards_per_set} for index in range(1, config.nb_sets + 1)]
+    return render("card_index", rows)
+
+def card_set_page(config: ReplayConfig, card_set: str) -> str:
+    rows = [{"set": card_set, "number": number} for number in range(1, config.cards_per_set + 1)]
+    return render("card_set", rows, set=card_set)
+
+def card_page(card_set: str, number: int) -> str:
+    name = card_names[number % len(card_names)]
+    evolves_from_line = f'<p class="card-text-evolves-from">Evolves from: {card_names[(number - 1) % len(card_names)]}</p>' if number % 3 == 0 else ""
+    rows = [{"attack": attack} for attack in range(1, 3)]
+    return render(
+        "card", rows, name=name, set=card_set, number=number, element=["Grass", "Fire", "Water", "Lightning"][number % 4],
+        hp=60 + 10 * (number % 10), stage="Stage 1" if number % 3 == 0 else "Basic", evolves_from_line=evolves_from_line,
+        rarity=["Common", "Uncommon", "Rare", "Ultra Rare"][number % 4]
+    )
+
+def create_app(config: ReplayConfig) -> web.Application:
+    # Simulated latency and injected errors (503, or 429 with a Retry-After) on every request
+    @web.middleware
+    async def network_conditions(request: web.Request, handler):
+        if config.latency_ms > 0 or config.jitter_ms > 0:
+            await asyncio.sleep(max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000)
+        if random.random() < config.error_rate:
+            if random.random() < 0.5:
+                return web.Response(status=429, headers={"Retry-After": "1"})
+            return web.Response(status=503)
+        return await handler(request)
+
+    def html(text: str) -> web.Response:
+        return web.Response(text=text, content_type="text/html")
+
+    async def handle_tournament_list(request):
+        return html(tournament_list_page(config, int(request.query.get("page", 1))))
+
+    async def handle_standings(request):
+        return html(standings_page(config, request.match_info["tournament"]))
+
+    async def handle_decklist(request):
+        return html(decklist_page(config, request.match_info["tournament"], request.match_info["player"]))
+
+    async def handle_pairings(request):
+        round_number = request.query.get("round")
+        return html(pairings_page(config, request.match_info["tournament"], int(round_number) if round_number else None))
+
+    async def handle_card_index(request):
+        return html(card_index_page(config))
+
+    async def handle_card_set(request):
+        return html(card_set_page(config, request.match_info["set"]))
+
+    async def handle_card(request):
+        return html(card_page(request.match_info["set"], int(request.match_info["number"])))
+
+    app = web.Application(middlewares=[network_conditions])
+    app.router.add_get("/tournaments/completed", handle_tournament_list)
+    app.router.add_get("/tournament/{tournament}/standings", handle_standings)
+    app.router.add_get("/tournament/{tournament}/player/{player}/decklist", handle_decklist)
+    app.router.add_get("/tournament/{tournament}/pairings", handle_pairings)
+    app.router.add_get("/cards", handle_card_index)
+    app.router.add_get("/cards/{set}", handle_card_set)
+    app.router.add_get("/cards/{set}/{number}", handle_card)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for play/pocket.limitlesstcg.com serving the HTML fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--scale", type=int, default=1, help="number of completed tournaments pages, card sets are twice as many")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean latency added to each response (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the added latency (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429 or 503")
+    args = parser.parse_args()
+
+    config = ReplayConfig(args.scale, args.latency, args.jitter, args.error_rate)
+    web.run_app(create_app(config), host=args.host, port=args.port, print=lambda message: print(message, flush=True))
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+# Caching rule of a page type: whether cached pages may be read back, how long (in seconds) they stay
+# valid, None meaning forever, and how long after expiring a page with an ETag or Last-Modified is kept
+# as a stale copy, so the next download of its URL is a conditional request that can end in 304
+@dataclass
+class CachePolicy:
+    use_cache: bool = True
+    ttl: float | None = None
+    stale_grace: float = 30 * 24 * 3600
+
+    def is_fresh(self, fetched_at: float) -> bool:
+        return self.ttl is None or time.time() - fetched_at <= self.ttl
+
+# HTML cache storing zlib compressed pages appended to a few sharded pack files,
+# with a single SQLite index mapping each URL to its location in a pack
+class PackCache:
+    def __init__(self, directory: str, nb_shards: int = 16):
+        self.directory = directory
+        self.nb_shards = nb_shards
+        self.packs = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self.index = sqlite3.connect(os.path.join(directory, "index.sqlite"))
+        self.index.execute("PRAGMA journal_mode=WAL")
+        self.index.execute("PRAGMA synchronous=NORMAL")
+        self.index.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                page_type TEXT,
+                shard INTEGER,
+                offset INTEGER,
+                length INTEGER,
+                fetched_at REAL,
+                content_hash TEXT,
+                etag TEXT,
+                last_modified TEXT
+            )
+        """)
+        columns = [row[1] for row in self.index.execute("PRAGMA table_info(pages)")]
+        if "etag" not in columns:
+            self.index.execute("ALTER TABLE pages ADD COLUMN etag TEXT")
+            self.index.execute("ALTER TABLE pages ADD COLUMN last_modified TEXT")
+        self.index.execute("CREATE INDEX IF NOT EXISTS idx_pages_fetched_at ON pages(fetched_at)")
+        self.index.commit()
+
+    def pack_path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"pack-{shard:02d}.bin")
+
+    def pack(self, shard: int):
+        if shard not in self.packs:
+            self.packs[shard] = open(self.pack_path(shard), "a+b")
+        return self.packs[shard]
+
+    def shard_of(self, url: str) -> int:
+        return int(hashlib.sha1(url.encode("utf-8")).hexdigest()[:8], 16) % self.nb_shards
+
+    # Return the cached HTML of a URL, or None when it is missing or expired
+    def get(self, url: str, policy: CachePolicy) -> str | None:
+        if not policy.use_cache:
+            return None
+
+        row = self.index.execute("SELECT shard, offset, length, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+
+        shard, offset, length, fetched_at = row
+        if not policy.is_fresh(fetched_at):
+            return None
+
+        pack = self.pack(shard)
+        pack.seek(offset)
+        try:
+            return zlib.decompress(pack.read(length)).decode("utf-8")
+        except zlib.error:
+            return None
+
+    # Return the ETag and Last-Modified headers of a cached page, to revalidate it with a conditional request
+    def validators(self, url: str) -> tuple[str | None, str | None]:
+        row = self.index.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        return row if row is not None else (None, None)
+
+    # Return a cached page whatever its age and mark it as fetched now (the server answered 304 Not Modified)
+    def revalidate(self, url: str) -> str | None:
+        html = self.get(url, CachePolicy())
+        if html is not None:
+            self.index.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.index.commit()
+        return html
+
+    # Append a page to its shard and point the index at it (an older copy becomes dead space)
+    def put(self, url: str, html: str, page_type: str, etag: str | None = None, last_modified: str | None = None):
+        data = html.encode("utf-8")
+        compressed = zlib.compress(data, 6)
+        shard = self.shard_of(url)
+
+        pack = self.pack(shard)
+        pack.seek(0, os.SEEK_END)
+        offset = pack.tell()
+        pack.write(compressed)
+        pack.flush()
+
+        self.index.execute(
+            "INSERT OR REPLACE INTO pages (url, page_type, shard, offset, length, fetched_at, content_hash, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, page_type, shard, offset, len(compressed), time.time(), hashlib.sha1(data).hexdigest(), etag, last_modified)
+        )
+        self.index.commit()
+
+    def delete(self, url: str):
+        self.index.execute("DELETE FROM pages WHERE url = ?", (url,))
+        self.index.commit()
+
+    # Drop expired pages of each page type (pages with validators only once their stale grace is over),
+    # then the oldest pages until the cache fits in max_size bytes
+    def evict(self, policies: dict[str, CachePolicy], max_size: int | None = None):
+        now = time.time()
+        for page_type, policy in policies.items():
+            if policy.ttl is not None:
+                self.index.execute(
+                    """
+                    DELETE FROM pages WHERE page_type = ? AND fetched_at < ?
+                    AND ((etag IS NULL AND last_modified IS NULL) OR fetched_at < ?)
+                    """,
+                    (page_type, now - policy.ttl, now - policy.ttl - policy.stale_grace)
+                )
+
+        if max_size is not None:
+            total_size = 0
+            rows = self.index.execute("SELECT url, length FROM pages ORDER BY fetched_at DESC").fetchall()
+            expired = []
+            for url, length in rows:
+                total_size += length
+                if total_size > max_size:
+                    expired.append((url,))
+            self.index.executemany("DELETE FROM pages WHERE url = ?", expired)
+
+        self.index.commit()
+        self.compact()
+
+    # Rewrite the packs holding more dead space than live pages
+    def compact(self):
+        for shard in range(self.nb_shards):
+            path = self.pack_path(shard)
+            if not os.path.isfile(path):
+                continue
+
+            rows = self.index.execute("SELECT url, offset, length FROM pages WHERE shard = ? ORDER BY offset", (shard,)).fetchall()
+            live_size = sum(length for _, _, length in rows)
+            if os.path.getsize(path) <= 2 * live_size:
+                continue
+
+            pack = self.pack(shard)
+            new_offsets = []
+            with open(path + ".tmp", "wb") as new_pack:
+                for url, offset, length in rows:
+                    pack.seek(offset)
+                    new_offsets.append((new_pack.tell(), url))
+                    new_pack.write(pack.read(length))
+
+            pack.close()
+            del self.packs[shard]
+            os.replace(path + ".tmp", path)
+            self.index.executemany("UPDATE pages SET offset = ? WHERE url = ?", new_offsets)
+            self.index.commit()
+
+    def close(self):
+        for pack in self.packs.values():
+            pack.close()
+        self.packs = {}
+        self.index.close()
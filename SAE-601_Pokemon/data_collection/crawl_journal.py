@@ -0,0 +1,58 @@
+import json
+import os
+
+# Append-only journal of the tournaments and completed tournaments pages handled by the
+# current crawl. Each entry is flushed as soon as it is recorded so that a crawl interrupted
+# by a crash resumes where it stopped; the journal is cleared once a crawl runs to the end
+class CrawlJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.tournaments = set()
+        self.pages = set()
+
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Last line cut by the crash
+
+                    if entry["type"] == "tournament":
+                        self.tournaments.add(entry["id"])
+                    elif entry["type"] == "page":
+                        self.pages.add(entry["page"])
+
+        self.file = open(path, "a", encoding="utf-8")
+
+    def is_resuming(self) -> bool:
+        return len(self.tournaments) > 0 or len(self.pages) > 0
+
+    # First tournaments page that was not completely handled by the interrupted crawl
+    def resume_page(self) -> int:
+        page = 1
+        while page in self.pages:
+            page += 1
+        return page
+
+    def record(self, entry: dict):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def record_tournament(self, tournament_id: str):
+        self.tournaments.add(tournament_id)
+        self.record({"type": "tournament", "id": tournament_id})
+
+    def record_page(self, page: int):
+        self.pages.add(page)
+        self.record({"type": "page", "page": page})
+
+    def clear(self):
+        self.file.close()
+        os.remove(self.path)
+        self.tournaments = set()
+        self.pages = set()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,213 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import os
+import time
+
+# Upper bounds (seconds) of the latency and duration histogram buckets
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Cumulative-bucket histogram as in Prometheus: memory does not grow with the number of observations,
+# quantiles are interpolated inside the bucket they fall in
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = latency_buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count > 0 and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_ms": round(1000 * self.sum / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.quantile(0.50), 3),
+            "p99_ms": round(1000 * self.quantile(0.99), 3),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+# Histogram of several histograms with the same buckets together (all the page types of a crawl...)
+def merge_histograms(histograms) -> Histogram:
+    total = Histogram()
+    for histogram in histograms:
+        total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+        total.count += histogram.count
+        total.sum += histogram.sum
+        total.max = max(total.max, histogram.max)
+    return total
+
+# Value going up and down (requests in flight, queue sizes), keeping its peak
+class Gauge:
+    def __init__(self):
+        self.value = 0
+        self.peak = 0
+
+    def set(self, value: int):
+        self.value = value
+        self.peak = max(self.peak, value)
+
+    def add(self, delta: int):
+        self.set(self.value + delta)
+
+    def summary(self) -> dict:
+        return {"current": self.value, "peak": self.peak}
+
+# Instrumentation of a crawl: request latency, downloaded bytes and cache lookups per page type,
+# parse time per page, queue depths and in-flight requests, and wall time of the crawl stages.
+# Everything is recorded from the event loop thread, so no locking is needed
+class CrawlMetrics:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.request_latency = defaultdict(Histogram)
+        self.responses = defaultdict(int)
+        self.bytes_downloaded = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.cache = defaultdict(int)
+        self.parse_time = defaultdict(Histogram)
+        self.parse_wait = defaultdict(Histogram)
+        self.tournament_time = Histogram()
+        self.stage_time = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.gauges = defaultdict(Gauge)
+
+    def observe_request(self, page_type: str, status: int, latency: float, nb_bytes: int):
+        self.request_latency[page_type].observe(latency)
+        self.responses[(page_type, status)] += 1
+        self.bytes_downloaded[page_type] += nb_bytes
+
+    def observe_retry(self, page_type: str):
+        self.retries[page_type] += 1
+
+    # result: "hit", "miss" or "revalidated" (cached copy confirmed by a 304)
+    def observe_cache(self, page_type: str, result: str):
+        self.cache[(page_type, result)] += 1
+
+    # duration: time spent in the parser itself, wait: time spent queued for a parser worker
+    def observe_parse(self, page_type: str, duration: float, wait: float):
+        self.parse_time[page_type].observe(duration)
+        self.parse_wait[page_type].observe(wait)
+
+    def observe_tournament(self, duration: float):
+        self.tournament_time.observe(duration)
+
+    def increment(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def gauge(self, name: str) -> Gauge:
+        return self.gauges[name]
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stage_time[name] += time.monotonic() - start
+
+    def page_types(self) -> list[str]:
+        return sorted(set(self.request_latency) | {page_type for page_type, _ in self.cache} | set(self.parse_time))
+
+    def summary(self) -> dict:
+        pages = {}
+        for page_type in self.page_types():
+            hits = self.cache.get((page_type, "hit"), 0) + self.cache.get((page_type, "revalidated"), 0)
+            lookups = hits + self.cache.get((page_type, "miss"), 0)
+            pages[page_type] = {
+                "requests": self.request_latency.get(page_type, Histogram()).summary(),
+                "responses": {str(status): count for (t, status), count in sorted(self.responses.items()) if t == page_type},
+                "retries": self.retries.get(page_type, 0),
+                "bytes_downloaded": self.bytes_downloaded.get(page_type, 0),
+                "cache": {result: count for (t, result), count in sorted(self.cache.items()) if t == page_type},
+                "cache_hit_ratio": round(hits / lookups, 4) if lookups else None,
+                "parse": self.parse_time.get(page_type, Histogram()).summary(),
+                "parse_wait": self.parse_wait.get(page_type, Histogram()).summary(),
+            }
+
+        elapsed = time.monotonic() - self.started_at
+        requests = merge_histograms(self.request_latency.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": requests.count,
+            "requests_per_s": round(requests.count / elapsed, 3) if elapsed > 0 else 0.0,
+            "request_latency": requests.summary(),
+            "parse": merge_histograms(self.parse_time.values()).summary(),
+            "bytes_downloaded": sum(self.bytes_downloaded.values()),
+            "stages_s": {name: round(duration, 3) for name, duration in self.stage_time.items()},
+            "tournaments": self.tournament_time.summary(),
+            "counters": dict(self.counters),
+            "gauges": {name: gauge.summary() for name, gauge in sorted(self.gauges.items())},
+            "pages": pages,
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    # Prometheus text exposition format, for the node_exporter textfile collector or a push to a gateway
+    def write_prometheus(self, path: str):
+        lines = []
+
+        def histogram_lines(name: str, help_text: str, histograms: dict):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for page_type, histogram in sorted(histograms.items()):
+                cumulated = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulated += count
+                    lines.append(f'{name}_bucket{{page_type="{page_type}",le="{bound}"}} {cumulated}')
+                lines.append(f'{name}_bucket{{page_type="{page_type}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{page_type="{page_type}"}} {histogram.sum}')
+                lines.append(f'{name}_count{{page_type="{page_type}"}} {histogram.count}')
+
+        def counter_lines(name: str, help_text: str, values: dict, labels: tuple[str, ...]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(values.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                label_text = ",".join(f'{label}="{label_value}"' for label, label_value in zip(labels, key))
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        histogram_lines("crawler_request_duration_seconds", "HTTP request latency by page type.", self.request_latency)
+        histogram_lines("crawler_parse_duration_seconds", "Time spent parsing a page by page type.", self.parse_time)
+        counter_lines("crawler_responses_total", "HTTP responses by page type and status.", self.responses, ("page_type", "status"))
+        counter_lines("crawler_downloaded_bytes_total", "Bytes downloaded by page type.", self.bytes_downloaded, ("page_type",))
+        counter_lines("crawler_retries_total", "Retried requests by page type.", self.retries, ("page_type",))
+        counter_lines("crawler_cache_lookups_total", "Page cache lookups by page type and result.", self.cache, ("page_type", "result"))
+        counter_lines("crawler_events_total", "Crawl events (tournaments handled, failed, skipped...).", self.counters, ("event",))
+
+        lines.append("# HELP crawler_stage_duration_seconds Wall time of each crawl stage.")
+        lines.append("# TYPE crawler_stage_duration_seconds gauge")
+        for name, duration in sorted(self.stage_time.items()):
+            lines.append(f'crawler_stage_duration_seconds{{stage="{name}"}} {duration}')
+
+        lines.append("# HELP crawler_gauge_peak Peak value of the crawl gauges (in-flight requests, queue depths).")
+        lines.append("# TYPE crawler_gauge_peak gauge")
+        for name, gauge in sorted(self.gauges.items()):
+            lines.append(f'crawler_gauge_peak{{gauge="{name}"}} {gauge.peak}')
+
+        # Written aside then renamed, so that a collector never reads a half-written file
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(path + ".tmp", path)
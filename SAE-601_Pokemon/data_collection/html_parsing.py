@@ -0,0 +1,58 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import importlib.util
+import re
+import time
+
+# BeautifulSoup backend: lxml when it is installed (several times faster), Python's html.parser otherwise
+parser_backend = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+# Only keep the tags having one of the given classes (and their subtrees) while parsing.
+# The class attribute is still a raw string at that point, hence the regex instead of class_=[...]
+def class_strainer(*classes: str, name: str | None = None) -> SoupStrainer:
+    regex_class = re.compile(r'(^|\s)(' + '|'.join(re.escape(c) for c in classes) + r')(\s|$)')
+    if name is None:
+        return SoupStrainer(class_=regex_class)
+    return SoupStrainer(name, class_=regex_class)
+
+# Subtrees the extractors need on each page type, pages not listed here are parsed whole
+page_strainers = {
+    "tournament_list": class_strainer("pagination", "completed-tournaments"),
+    "standings": class_strainer("striped"),
+    "decklist": class_strainer("decklist", name="div"),
+    "pairings": class_strainer("mini-nav", "live-bracket", "pairings"),
+}
+
+# Parse an HTML page, restricted to the subtree its page type needs
+def parse_html(html: str, page_type: str | None = None) -> BeautifulSoup:
+    return BeautifulSoup(html, parser_backend, parse_only=page_strainers.get(page_type))
+
+# Call a parser and also return the time it took and the time the call waited for a worker
+# (wall clock, as the call is submitted and run in different processes)
+def timed_call(parser, submitted_at: float, *args):
+    started_at = time.time()
+    result = parser(*args)
+    return result, time.time() - started_at, started_at - submitted_at
+
+# Runs page parsers in a process pool so that parsing does not block the downloads on the
+# event loop. Parsers must be module level functions returning picklable values (dataclasses).
+# With 0 workers, parsers run inline on the event loop
+class ParserPool:
+    def __init__(self, workers: int):
+        self.executor = ProcessPoolExecutor(workers) if workers > 0 else None
+
+    async def run(self, parser, *args):
+        if self.executor is None:
+            return parser(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, parser, *args)
+
+    # Same as run, returning (result, parse duration, wait for a worker) in seconds
+    async def run_timed(self, parser, *args):
+        if self.executor is None:
+            return timed_call(parser, time.time(), *args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, timed_call, parser, time.time(), *args)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
@@ -1,25 +1,101 @@
 from bs4 import BeautifulSoup, Tag
+from collections import deque
+from contextlib import nullcontext
 from dataclasses import dataclass, asdict
 import aiohttp
-import aiofile
+import argparse
 import asyncio
 import os
 import json
 import re
-import requests
 import time
+from urllib.parse import urlsplit
+
+from cache_store import CachePolicy, PackCache
+from crawl_journal import CrawlJournal
+from crawl_metrics import CrawlMetrics
+from html_parsing import ParserPool, parse_html
+from output_writer import output_class, output_formats
+from rate_limit import HostLimiter
+from resilience import CircuitBreaker, CircuitOpenError, UnexpectedPageError, is_retryable, retry_delay
 
 base_url = "https://play.limitlesstcg.com"
 cards_base_url = "https://pocket.limitlesstcg.com"
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.106 Safari/537.36'}
 
+# Crawl scheduling: HTTP requests in flight at once, tournaments extracted concurrently
+# and decklists fetched ahead of the output of each tournament
+max_in_flight_requests = 20
+tournament_workers = 4
+decklist_window = 16
+
+# Retries of failed requests: attempts per request, exponential backoff bounds (seconds),
+# and consecutive failures opening the circuit breaker of a host for a cooldown (seconds)
+max_attempts = 5
+backoff_base = 1.0
+backoff_max = 60.0
+breaker_threshold = 5
+breaker_cooldown = 30.0
+
+# Processes parsing the downloaded pages (0 to parse on the event loop)
+parse_workers = max(1, (os.cpu_count() or 2) - 1)
+
+# Card catalog scraping limits: requests per second and burst per host, concurrent requests per host
+cards_rate_limit = 5.0
+cards_burst = 10
+cards_max_per_host = 8
+cards_timeout = aiohttp.ClientTimeout(total=10)
+
 # Define base directory for data collection
 base_data_dir = "data_collection"
 output_dir = os.path.join(base_data_dir, "output")
+# Tournaments output: "json" (one file per tournament), "ndjson" (one line per tournament in
+# output/tournaments.ndjson) or "parquet" (tournaments, players, decklists and matches tables in output/parquet)
+output_format = "json"
 cards_output_file = os.path.join(base_data_dir, "pokemon_cards.json")
-
-# Ensure directories exist
-os.makedirs(output_dir, exist_ok=True)
+cache_dir = os.path.join(base_data_dir, "cache")
+crawl_state_file = os.path.join(base_data_dir, "crawl_state.json")
+crawl_journal_file = os.path.join(base_data_dir, "crawl_journal.jsonl")
+metrics_file = os.path.join(base_data_dir, "crawl_metrics.json")
+
+# Cache policy of each page type: listings expire, tournament pages are kept for good
+cache_policies = {
+    "tournament_list": CachePolicy(ttl=3600),
+    "standings": CachePolicy(),
+    "decklist": CachePolicy(),
+    "pairings": CachePolicy(),
+    "card_index": CachePolicy(ttl=24 * 3600),
+    "card_set": CachePolicy(ttl=24 * 3600),
+    "card": CachePolicy(ttl=7 * 24 * 3600),
+    "other": CachePolicy(use_cache=False),
+}
+cache_max_size = 2 * 1024 ** 3
+
+regex_page_types = [
+    ("tournament_list", re.compile(r'/tournaments/completed')),
+    ("standings", re.compile(r'/tournament/[a-zA-Z0-9_\-]*/standings')),
+    ("decklist", re.compile(r'/tournament/[a-zA-Z0-9_\-]*/player/[a-zA-Z0-9_]*/decklist')),
+    ("pairings", re.compile(r'/tournament/[a-zA-Z0-9_\-]*/pairings')),
+    ("card", re.compile(r'/cards/[A-Za-z0-9]+/[0-9]+$')),
+    ("card_set", re.compile(r'/cards/[A-Za-z0-9]+$')),
+    ("card_index", re.compile(r'/cards$')),
+]
+
+circuit_breakers: dict[str, CircuitBreaker] = {}
+
+# Page cache, parser pool and metrics of the crawl, created by start_crawl() rather than at import: parser workers
+# started by spawn or forkserver re-import this module, and must neither open the cache index nor start a pool.
+# Until then pages are parsed on the event loop and no cache is open
+page_cache: PackCache | None = None
+parser_pool = ParserPool(0)
+metrics = CrawlMetrics()
+
+def start_crawl():
+    global page_cache, parser_pool, metrics
+    os.makedirs(output_dir, exist_ok=True)
+    page_cache = PackCache(cache_dir)
+    parser_pool = ParserPool(parse_workers)
+    metrics = CrawlMetrics()
 
 # Dataclasses used for json generation
 @dataclass
@@ -46,6 +122,29 @@ class MatchResult:
 class Match:
     match_results: list[MatchResult]
 
+@dataclass
+class StandingsItem:
+    id: str
+    name: str
+    placing: str
+    country: str
+    has_decklist: bool
+
+@dataclass
+class TournamentListItem:
+    id: str
+    name: str
+    date: str
+    organizer: str
+    format: str
+    nb_players: str
+
+@dataclass
+class CrawlState:
+    newest_date: str | None
+    known_ids: set[str]
+    failed: dict[str, TournamentListItem]
+
 @dataclass
 class Tournament:
     id: str
@@ -157,105 +256,222 @@ def extract_decklist(decklist: BeautifulSoup) -> list[DeckListItem]:
 
     return cards
 
-# Extract a BeautifulSoup object from a URL
-async def async_soup_from_url(session: aiohttp.ClientSession, sem: asyncio.Semaphore, url: str, use_cache: bool = True):
-    if url is None:
-        return None
+# Return the players of a standings page, in placing order
+regex_player_id = re.compile(r'/tournament/[a-zA-Z0-9_\-]*/player/[a-zA-Z0-9_]*')
+regex_decklist_url = re.compile(r'/tournament/[a-zA-Z0-9_\-]*/player/[a-zA-Z0-9_]*/decklist')
 
-    cache_filename = "cache" + url
-    cache_filename = ''.join(x for x in cache_filename if (x == "/" or x.isalnum()))
-    cache_filename = f"{cache_filename}.html"
+def extract_standings(standings_page: BeautifulSoup) -> list[StandingsItem]:
+    standings = []
+    for player_tr in extract_trs(standings_page, "striped"):
+        standings.append(StandingsItem(
+            player_tr.find("a", {'href': regex_player_id}).attrs["href"].split('/')[4],
+            player_tr.attrs['data-name'],
+            player_tr.attrs.get("data-placing", -1),
+            player_tr.attrs.get("data-country", None),
+            player_tr.find("a", {'href': regex_decklist_url}) is not None
+        ))
 
-    html = ""
+    return standings
 
-    if use_cache and os.path.isfile(cache_filename):
-        async with sem:
-            async with aiofile.async_open(cache_filename, "r") as file:
-                html = await file.read()
-    else:
-        async with session.get(url) as resp:
-            html = await resp.text()
-
-        # Ensure the directory exists before writing the file
-        directory = os.path.dirname(cache_filename)
-        if not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-
-        async with sem:
-            async with aiofile.async_open(cache_filename, "w") as file:
-                await file.write(html)
-
-    return BeautifulSoup(html, 'html.parser')
-
-async def extract_players(session: aiohttp.ClientSession, sem: asyncio.Semaphore, standings_page: BeautifulSoup, tournament_id: str) -> list[Player]:
-    players = []
-    player_trs = extract_trs(standings_page, "striped")
-    player_ids = [player_tr.find("a", {'href': regex_player_id}).attrs["href"].split('/')[4] for player_tr in player_trs]
-    has_decklist = [player_tr.find("a", {'href': regex_decklist_url}) is not None for player_tr in player_trs]
-    player_names = [player_tr.attrs['data-name'] for player_tr in player_trs]
-    player_placings = [player_tr.attrs.get("data-placing", -1) for player_tr in player_trs]
-    player_countries = [player_tr.attrs.get("data-country", None) for player_tr in player_trs]
-
-    decklist_urls = []
-    for i in range(len(player_ids)):
-        decklist_urls.append(construct_decklist_url(tournament_id, player_ids[i]) if has_decklist[i] else None)
-
-    player_decklists = await asyncio.gather(*[async_soup_from_url(session, sem, url, True) for url in decklist_urls])
-
-    players = []
-    for i in range(len(player_ids)):
-        if player_decklists[i] is None:
-            continue
+regex_standings_url = re.compile(r'/tournament/[a-zA-Z0-9_\-]*/standings')
 
-        players.append(Player(
-            player_ids[i],
-            player_names[i],
-            player_placings[i],
-            player_countries[i],
-            extract_decklist(player_decklists[i])
+# Return the current and last page numbers of a completed tournaments page
+def extract_pagination(soup: BeautifulSoup):
+    pagination = soup.find("ul", class_="pagination")
+    return int(pagination.attrs["data-current"]), int(pagination.attrs["data-max"])
+
+# Return the tournaments listed on a completed tournaments page
+def extract_tournament_list(soup: BeautifulSoup) -> list[TournamentListItem]:
+    tournaments = []
+    for tournament_tr in extract_trs(soup, "completed-tournaments"):
+        tournaments.append(TournamentListItem(
+            tournament_tr.find("a", {'href': regex_standings_url}).attrs["href"].split('/')[2],
+            tournament_tr.attrs['data-name'],
+            tournament_tr.attrs['data-date'],
+            tournament_tr.attrs['data-organizer'],
+            tournament_tr.attrs['data-format'],
+            tournament_tr.attrs['data-players']
         ))
 
-    return players
+    return tournaments
 
-async def extract_matches(session: aiohttp.ClientSession, sem: asyncio.Semaphore, tournament_id: str) -> list[Match]:
-    matches = []
-    last_pairings = await async_soup_from_url(session, sem, construct_pairings_url(tournament_id))
-    previous_pairings_urls = extract_previous_pairings_urls(last_pairings)
-    pairings = await asyncio.gather(*[async_soup_from_url(session, sem, url) for url in previous_pairings_urls])
-    pairings.append(last_pairings)
-
-    for pairing in pairings:
-        if is_bracket_pairing(pairing):
-            matches = matches + extract_matches_from_bracket_pairings(pairing)
-        elif is_table_pairing(pairing):
-            matches = matches + extract_matches_from_table_pairings(pairing)
-        else:
-            raise Exception("Unrecognized pairing type")
+# Page parsers, run by the parser pool: they take the HTML of a page and only return picklable values
+def parse_tournament_list_page(html: str):
+    soup = parse_html(html, "tournament_list")
+    current_page, max_page = extract_pagination(soup)
+    return current_page, max_page, extract_tournament_list(soup)
 
-    return matches
+def parse_standings_page(html: str) -> list[StandingsItem]:
+    return extract_standings(parse_html(html, "standings"))
 
-regex_player_id = re.compile(r'/tournament/[a-zA-Z0-9_\-]*/player/[a-zA-Z0-9_]*')
-regex_decklist_url = re.compile(r'/tournament/[a-zA-Z0-9_\-]*/player/[a-zA-Z0-9_]*/decklist')
+def parse_decklist_page(html: str) -> list[DeckListItem]:
+    return extract_decklist(parse_html(html, "decklist"))
 
-async def handle_tournament_standings_page(session: aiohttp.ClientSession, sem: asyncio.Semaphore, standings_page: BeautifulSoup, tournament_id: str, tournament_name: str, tournament_date: str, tournament_organizer: str, tournament_format: str, tournament_nb_players: int):
-    output_file = os.path.join(output_dir, f"{tournament_id}.json")
-    print(f"Extracting tournament {tournament_id}", end="... ")
+# Return the URLs of the previous pairing pages and the matches of a pairing page
+def parse_pairings_page(html: str):
+    pairings = parse_html(html, "pairings")
 
-    if os.path.isfile(output_file):
-        print("Skipping because tournament is already in output")
-        return
+    if is_bracket_pairing(pairings):
+        matches = extract_matches_from_bracket_pairings(pairings)
+    elif is_table_pairing(pairings):
+        matches = extract_matches_from_table_pairings(pairings)
+    else:
+        raise UnexpectedPageError("Unrecognized pairing type")
+
+    return extract_previous_pairings_urls(pairings), matches
+
+# Download a URL, as a conditional request when validators of a cached copy are given.
+# Return the HTML (None when the server answered 304 Not Modified) with its ETag and Last-Modified headers
+async def async_download(session: aiohttp.ClientSession, url: str, etag: str | None = None, last_modified: str | None = None, headers: dict | None = None, **kwargs):
+    request_headers = dict(headers or {})
+    if etag is not None:
+        request_headers["If-None-Match"] = etag
+    if last_modified is not None:
+        request_headers["If-Modified-Since"] = last_modified
+
+    page_type = page_type_for_url(url)
+    start = time.perf_counter()
+    async with session.get(url, headers=request_headers, **kwargs) as resp:
+        if resp.status == 304:
+            metrics.observe_request(page_type, resp.status, time.perf_counter() - start, 0)
+            return None, etag, last_modified
+
+        body = await resp.read()
+        metrics.observe_request(page_type, resp.status, time.perf_counter() - start, len(body))
+        resp.raise_for_status()
+        return await resp.text(), resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+# Download a URL with retries: exponential backoff with jitter (or the server's Retry-After) between
+# attempts, and a circuit breaker per host. Backoff and rate-limit waits do not hold the in-flight semaphore
+async def async_download_with_retries(session: aiohttp.ClientSession, sem: asyncio.Semaphore, url: str, limiter: HostLimiter | None = None, etag: str | None = None, last_modified: str | None = None, **kwargs):
+    host = urlsplit(url).netloc or urlsplit(base_url).netloc
+    if host not in circuit_breakers:
+        circuit_breakers[host] = CircuitBreaker(host, breaker_threshold, breaker_cooldown)
+    breaker = circuit_breakers[host]
+
+    attempt = 0
+    while True:
+        try:
+            breaker.check()
+            # The host limiter comes first: a task waiting for its host's cap or token holds no global slot
+            async with (limiter.limit(url) if limiter is not None else nullcontext()), sem:
+                metrics.gauge("in_flight_requests").add(1)
+                try:
+                    result = await async_download(session, url, etag, last_modified, **kwargs)
+                finally:
+                    metrics.gauge("in_flight_requests").add(-1)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if not isinstance(e, CircuitOpenError):
+                breaker.record_failure()
+
+            attempt += 1
+            if attempt >= max_attempts:
+                raise
+
+            delay = retry_delay(e, attempt, backoff_base, backoff_max)
+            metrics.observe_retry(page_type_for_url(url))
+            print(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 1}/{max_attempts}): {e!r}")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+# Classify a URL into the page type used to pick its cache policy
+def page_type_for_url(url: str) -> str:
+    for page_type, regex in regex_page_types:
+        if regex.search(url):
+            return page_type
+    return "other"
+
+# Fetch the HTML of a URL, going through the page cache according to the policy of its page type
+# (only actual downloads count against the in-flight semaphore and the optional rate limiter).
+# Error responses raise once retries are exhausted and are never cached
+async def async_html_from_url(session: aiohttp.ClientSession, sem: asyncio.Semaphore, url: str, limiter: HostLimiter | None = None, **kwargs) -> str:
+    page_type = page_type_for_url(url)
+    policy = cache_policies.get(page_type, CachePolicy())
+
+    html = page_cache.get(url, policy)
+    if html is not None:
+        metrics.observe_cache(page_type, "hit")
+        return html
+
+    etag, last_modified = page_cache.validators(url) if policy.use_cache else (None, None)
+    html, etag, last_modified = await async_download_with_retries(session, sem, url, limiter, etag, last_modified, **kwargs)
+    if html is None:
+        html = page_cache.revalidate(url)
+        if html is not None:
+            metrics.observe_cache(page_type, "revalidated")
+            return html
+
+        # The cached copy is unreadable, download the page again without validators
+        html, etag, last_modified = await async_download_with_retries(session, sem, url, limiter, **kwargs)
+
+    metrics.observe_cache(page_type, "miss" if policy.use_cache else "bypass")
+    if policy.use_cache:
+        page_cache.put(url, html, page_type, etag, last_modified)
+    return html
+
+# Run a page parser in the parser pool, recording its parse time and its wait for a worker
+async def run_parser(page_type: str, parser, *args):
+    result, duration, wait = await parser_pool.run_timed(parser, *args)
+    metrics.observe_parse(page_type, duration, wait)
+    return result
+
+# Fetch a URL and extract its content with a page parser run by the parser pool
+async def async_parse_url(session: aiohttp.ClientSession, sem: asyncio.Semaphore, url: str, parser):
+    if url is None:
+        return None
 
-    players = await extract_players(session, sem, standings_page, tournament_id)
-    if len(players) == 0:
-        print("Skipping because no decklist was detected")
-        return
+    html = await async_html_from_url(session, sem, url)
+    try:
+        return await run_parser(page_type_for_url(url), parser, html)
+    except Exception:
+        # Do not keep a page that could not be parsed (error or maintenance page served as 200)
+        page_cache.delete(url)
+        raise
+
+async def extract_player(session: aiohttp.ClientSession, sem: asyncio.Semaphore, standing: StandingsItem, tournament_id: str) -> Player:
+    decklist = await async_parse_url(session, sem, construct_decklist_url(tournament_id, standing.id), parse_decklist_page)
+    return Player(standing.id, standing.name, standing.placing, standing.country, decklist)
+
+# Yield the players having a decklist in placing order, with at most decklist_window decklists
+# being fetched or waiting to be consumed, so memory does not grow with the tournament size
+async def extract_players(session: aiohttp.ClientSession, sem: asyncio.Semaphore, standings: list[StandingsItem], tournament_id: str):
+    pending = deque()
+    pending_gauge = metrics.gauge("pending_decklists")
+    try:
+        for standing in standings:
+            if not standing.has_decklist:
+                continue
+
+            pending.append(asyncio.create_task(extract_player(session, sem, standing, tournament_id)))
+            pending_gauge.add(1)
+            if len(pending) >= decklist_window:
+                pending_gauge.add(-1)
+                yield await pending.popleft()
+
+        while pending:
+            pending_gauge.add(-1)
+            yield await pending.popleft()
+    finally:
+        pending_gauge.add(-len(pending))
+        for task in pending:
+            task.cancel()
+
+async def extract_matches(session: aiohttp.ClientSession, sem: asyncio.Semaphore, tournament_id: str) -> list[Match]:
+    previous_pairings_urls, last_matches = await async_parse_url(session, sem, construct_pairings_url(tournament_id), parse_pairings_page)
+    pairings = await asyncio.gather(*[async_parse_url(session, sem, url, parse_pairings_page) for url in previous_pairings_urls])
+
+    matches = []
+    for _, pairing_matches in pairings:
+        matches = matches + pairing_matches
 
-    nb_decklists = 0
-    for player in players:
-        if len(player.decklist) > 0:
-            nb_decklists += 1
+    return matches + last_matches
 
-    matches = await extract_matches(session, sem, tournament_id)
+async def handle_tournament_standings_page(session: aiohttp.ClientSession, sem: asyncio.Semaphore, output, standings: list[StandingsItem], tournament_id: str, tournament_name: str, tournament_date: str, tournament_organizer: str, tournament_format: str, tournament_nb_players: int):
+    start = time.monotonic()
 
     tournament = Tournament(
         tournament_id,
@@ -264,51 +480,182 @@ async def handle_tournament_standings_page(session: aiohttp.ClientSession, sem:
         tournament_organizer,
         tournament_format,
         tournament_nb_players,
-        players,
-        matches
+        [],
+        []
     )
 
-    print(f"{len(players)} players, {nb_decklists} decklists, {len(matches)} matches")
+    # Players are written as soon as their decklist is extracted, then dropped
+    with output.writer(tournament) as writer:
+        nb_decklists = 0
+        async for player in extract_players(session, sem, standings, tournament_id):
+            writer.write_player(player)
+            if len(player.decklist) > 0:
+                nb_decklists += 1
+
+        if writer.nb_players == 0:
+            writer.discard()
+            metrics.increment("tournaments_without_decklist")
+            print(f"Tournament {tournament_id}: skipping because no decklist was detected")
+            return
+
+        matches = await extract_matches(session, sem, tournament_id)
+        writer.write_matches(matches)
+
+    metrics.observe_tournament(time.monotonic() - start)
+    metrics.increment("tournaments_extracted")
+    metrics.increment("players", writer.nb_players)
+    metrics.increment("decklists", nb_decklists)
+    metrics.increment("matches", len(matches))
+    print(f"Tournament {tournament_id}: {writer.nb_players} players, {nb_decklists} decklists, {len(matches)} matches")
+
+# Fetch the standings of a tournament from the completed list and extract it, unless it is already in output
+async def handle_tournament(session: aiohttp.ClientSession, sem: asyncio.Semaphore, output, tournament: TournamentListItem):
+    if output.contains(tournament.id):
+        metrics.increment("tournaments_already_in_output")
+        print(f"Tournament {tournament.id}: skipping because tournament is already in output")
+        return
 
-    with open(output_file, "w") as f:
-        json.dump(asdict(tournament), f, indent=2)
+    standings = await async_parse_url(session, sem, construct_standings_url(tournament.id), parse_standings_page)
+    await handle_tournament_standings_page(session, sem, output, standings, tournament.id, tournament.name, tournament.date, tournament.organizer, tournament.format, tournament.nb_players)
 
 first_tournament_page = "/tournaments/completed?game=POCKET&format=STANDARD&platform=all&type=online&time=all"
-regex_standings_url = re.compile(r'/tournament/[a-zA-Z0-9_\-]*/standings')
 
-async def handle_tournament_list_page(session: aiohttp.ClientSession, sem: asyncio.Semaphore, url: str):
-    soup = await async_soup_from_url(session, sem, url, False)
-    current_page = int(soup.find("ul", class_="pagination").attrs["data-current"])
-    max_page = int(soup.find("ul", class_="pagination").attrs["data-max"])
-    print(f"Extracting completed tournaments page {current_page}")
+def construct_tournament_list_url(page: int):
+    return f"{first_tournament_page}&page={page}"
+
+# Crawl watermark: newest tournament date and IDs of the tournaments already handled by a previous crawl,
+# with the listing entries of the tournaments that failed, retried by the next crawl wherever they are listed
+def load_crawl_state() -> CrawlState:
+    if not os.path.isfile(crawl_state_file):
+        return CrawlState(None, set(), {})
+
+    with open(crawl_state_file, encoding="utf-8") as f:
+        state = json.load(f)
+
+    failed = {item["id"]: TournamentListItem(**item) for item in state.get("failed", [])}
+    return CrawlState(state["newest_date"], set(state["known_ids"]), failed)
+
+def save_crawl_state(state: CrawlState):
+    with open(crawl_state_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "newest_date": state.newest_date,
+            "known_ids": sorted(state.known_ids),
+            "failed": [asdict(state.failed[tournament_id]) for tournament_id in sorted(state.failed)],
+        }, f)
+    os.replace(crawl_state_file + ".tmp", crawl_state_file)
+
+def is_known_tournament(state: CrawlState, output, tournament: TournamentListItem):
+    return tournament.id in state.known_ids or output.contains(tournament.id)
+
+# Worker of the tournament pool: handles (page, tournament) items from the queue until it receives None
+# (page is None for the retried failures of previous crawls).
+# A tournament that fails is reported and kept in the crawl state so that the next crawl retries it
+async def tournament_worker(session: aiohttp.ClientSession, sem: asyncio.Semaphore, output, queue: asyncio.Queue, state: CrawlState, journal: CrawlJournal, pages: dict):
+    while True:
+        item = await queue.get()
+        metrics.gauge("tournament_queue").set(queue.qsize())
+        if item is None:
+            return
+
+        page, tournament = item
+        try:
+            await handle_tournament(session, sem, output, tournament)
+        except Exception as e:
+            metrics.increment("tournaments_failed")
+            print(f"Tournament {tournament.id}: failed ({e!r}), it will be retried by the next crawl")
+            state.failed[tournament.id] = tournament
+            if page is not None:
+                pages[page]["failed"] = True
+        else:
+            state.failed.pop(tournament.id, None)
+            state.known_ids.add(tournament.id)
+            if state.newest_date is None or tournament.date > state.newest_date:
+                state.newest_date = tournament.date
+            journal.record_tournament(tournament.id)
 
-    tournament_trs = extract_trs(soup, "completed-tournaments")
-    tournament_ids = [tournament_tr.find("a", {'href': regex_standings_url}).attrs["href"].split('/')[2] for tournament_tr in tournament_trs]
-    tournament_names = [tournament_tr.attrs['data-name'] for tournament_tr in tournament_trs]
-    tournament_dates = [tournament_tr.attrs['data-date'] for tournament_tr in tournament_trs]
-    tournament_organizers = [tournament_tr.attrs['data-organizer'] for tournament_tr in tournament_trs]
-    tournament_formats = [tournament_tr.attrs['data-format'] for tournament_tr in tournament_trs]
-    tournament_nb_players = [tournament_tr.attrs['data-players'] for tournament_tr in tournament_trs]
+        if page is None:
+            continue
+        pages[page]["remaining"] -= 1
+        if pages[page]["remaining"] == 0 and not pages[page]["failed"]:
+            journal.record_page(page)
+
+# Walk the completed tournaments pages, fetching the next page while the tournaments of
+# the current one are handled by a bounded pool of workers.
+# The tournaments that failed in previous crawls are queued first: in incremental mode, paging stops at the
+# first page listing only known tournaments, and would never reach a failure listed on an older page.
+# Handled tournaments and pages go to the crawl journal, so an interrupted crawl resumes at its first unfinished page
+async def handle_tournament_list_pages(session: aiohttp.ClientSession, sem: asyncio.Semaphore, output, state: CrawlState, journal: CrawlJournal, incremental: bool = False):
+    queue = asyncio.Queue(maxsize=tournament_workers * 2)
+    pages = {}
+
+    first_page = 1
+    if journal.is_resuming():
+        state.known_ids |= journal.tournaments
+        for tournament_id in journal.tournaments:
+            state.failed.pop(tournament_id, None)
+        first_page = journal.resume_page()
+        print(f"Resuming the interrupted crawl at page {first_page}")
+
+    retried = list(state.failed.values())
+    retried_ids = {tournament.id for tournament in retried}
+
+    async def produce():
+        if retried:
+            print(f"Retrying {len(retried)} tournaments that failed in a previous crawl")
+        for tournament in retried:
+            metrics.increment("tournaments_retried")
+            await queue.put((None, tournament))
+
+        first_page_url = construct_tournament_list_url(first_page) if first_page > 1 else first_tournament_page
+        next_page = asyncio.create_task(async_parse_url(session, sem, first_page_url, parse_tournament_list_page))
+        while next_page is not None:
+            current_page, max_page, tournaments = await next_page
+            print(f"Extracting completed tournaments page {current_page}/{max_page}")
+
+            if incremental:
+                tournaments = [tournament for tournament in tournaments if not is_known_tournament(state, output, tournament)]
+                if len(tournaments) == 0:
+                    print(f"Stopping at page {current_page}: every tournament is already known (newest known date: {state.newest_date})")
+                    break
+            # Already queued as retried failures
+            tournaments = [tournament for tournament in tournaments if tournament.id not in retried_ids]
+
+            next_page = None
+            if current_page < max_page:
+                next_page = asyncio.create_task(async_parse_url(session, sem, construct_tournament_list_url(current_page + 1), parse_tournament_list_page))
+
+            pages[current_page] = {"remaining": len(tournaments), "failed": False}
+            if len(tournaments) == 0:
+                journal.record_page(current_page)
+
+            for tournament in tournaments:
+                await queue.put((current_page, tournament))
+                metrics.gauge("tournament_queue").set(queue.qsize())
+
+        for _ in range(tournament_workers):
+            await queue.put(None)
 
-    standings_urls = [construct_standings_url(tournament_id) for tournament_id in tournament_ids]
-    standings = await asyncio.gather(*[async_soup_from_url(session, sem, url) for url in standings_urls])
+    try:
+        await asyncio.gather(produce(), *[tournament_worker(session, sem, output, queue, state, journal, pages) for _ in range(tournament_workers)])
+    finally:
+        save_crawl_state(state)
 
-    for i in range(len(tournament_ids)):
-        await handle_tournament_standings_page(session, sem, standings[i], tournament_ids[i], tournament_names[i], tournament_dates[i], tournament_organizers[i], tournament_formats[i], tournament_nb_players[i])
+    # The crawl went through, the watermark now holds everything the journal knew
+    journal.clear()
 
-    if current_page < max_page:
-        await handle_tournament_list_page(session, sem, f"{first_tournament_page}&page={current_page+1}")
+# Fetch the HTML of a cards site page, throttled by the per-host rate limiter
+async def async_text_from_url(session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: HostLimiter, url: str) -> str:
+    return await async_html_from_url(session, sem, url, limiter, headers=headers, timeout=cards_timeout)
 
-def get_all_set_links():
+async def get_all_set_links(session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: HostLimiter):
     cards_index_url = f"{cards_base_url}/cards"
     try:
-        r = requests.get(cards_index_url, headers=headers, timeout=10)
-        r.raise_for_status()
+        html = await async_text_from_url(session, sem, limiter, cards_index_url)
     except Exception as e:
         print("Impossible d'atteindre la page des sets :", e)
         return []
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = parse_html(html)
     liens_sets = set()
 
     for a in soup.find_all("a", href=re.compile(r"^/cards/[A-Za-z0-9]+$")):
@@ -317,15 +664,14 @@ def get_all_set_links():
 
     return sorted(liens_sets)
 
-def get_all_card_links_from_set(set_url):
+async def get_all_card_links_from_set(session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: HostLimiter, set_url):
     try:
-        r = requests.get(set_url, headers=headers, timeout=10)
-        r.raise_for_status()
+        html = await async_text_from_url(session, sem, limiter, set_url)
     except Exception as e:
         print(f"  → Impossible de charger le set {set_url} :", e)
         return []
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = parse_html(html)
     liens_cartes = set()
 
     pattern_card = re.compile(r"^/cards/[A-Za-z0-9]+/[0-9]+$")
@@ -335,15 +681,17 @@ def get_all_card_links_from_set(set_url):
 
     return sorted(liens_cartes)
 
-def scrape_card_info(card_url):
+async def scrape_card_info(session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: HostLimiter, card_url):
     try:
-        r = requests.get(card_url, headers=headers, timeout=10)
-        r.raise_for_status()
+        html = await async_text_from_url(session, sem, limiter, card_url)
     except Exception as e:
         print(f"    → Échec du chargement de la carte {card_url} : {e}")
         return None
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    return await run_parser("card", parse_card_info, html, card_url)
+
+def parse_card_info(html: str, card_url: str):
+    soup = parse_html(html)
 
     img_tag = soup.select_one("div.card-image img")
     image_url = img_tag["src"].strip() if img_tag and img_tag.has_attr("src") else None
@@ -405,46 +753,73 @@ def scrape_card_info(card_url):
     }
 
 
-async def main():
-    connector = aiohttp.TCPConnector(limit=20)
-    sem = asyncio.Semaphore(50)
-
-    async with aiohttp.ClientSession(base_url=base_url, connector=connector) as session:
-        await handle_tournament_list_page(session, sem, first_tournament_page)
-
-    set_links = get_all_set_links()
+# Scrape the whole card catalog concurrently, keeping the sorted URL order of the output
+async def scrape_cards(session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: HostLimiter):
+    set_links = await get_all_set_links(session, sem, limiter)
     if not set_links:
         print("Aucun set trouvé. Vérifie que https://pocket.limitlesstcg.com/cards est accessible.")
-        return
+        return None
 
     print(f"{len(set_links)} sets trouvés :")
     for url_set in set_links:
         print("•", url_set)
     print()
 
-    all_card_links = []
-    for idx, set_url in enumerate(set_links, start=1):
-        print(f"[{idx}/{len(set_links)}] Exploration du set {set_url}…")
-        cartes_du_set = get_all_card_links_from_set(set_url)
-        print(f"    {len(cartes_du_set)} cartes dans ce set.")
-        all_card_links.extend(cartes_du_set)
-        time.sleep(0.5)
+    cartes_par_set = await asyncio.gather(*[get_all_card_links_from_set(session, sem, limiter, set_url) for set_url in set_links])
+    for set_url, cartes_du_set in zip(set_links, cartes_par_set):
+        print(f"{set_url} : {len(cartes_du_set)} cartes dans ce set.")
 
-    all_card_links = sorted(set(all_card_links))
+    all_card_links = sorted(set(card_url for cartes_du_set in cartes_par_set for card_url in cartes_du_set))
 
     if not all_card_links:
         print("Aucun lien de carte trouvé. Peut-être que les sélecteurs ont changé.")
-        return
+        return None
 
     print(f"\nAu total, {len(all_card_links)} cartes récupérées.\n")
 
-    cards_data = []
-    for i, card_url in enumerate(all_card_links, start=1):
-        print(f"[{i}/{len(all_card_links)}] Scraping {card_url}")
-        info = scrape_card_info(card_url)
-        if info:
-            cards_data.append(info)
-        time.sleep(0.3)
+    cards_info = await asyncio.gather(*[scrape_card_info(session, sem, limiter, card_url) for card_url in all_card_links])
+    return [info for info in cards_info if info]
+
+# Print where the crawl time went and write the metrics summary (and Prometheus metrics if asked)
+def report_metrics(prometheus_file: str | None = None):
+    summary = metrics.summary()
+    print(f"\nCrawl: {summary['requests']} requests in {summary['elapsed_s']:.1f}s, {summary['bytes_downloaded'] / 1024 ** 2:.1f} MB downloaded, stages: {summary['stages_s']}")
+    for page_type, page_metrics in summary["pages"].items():
+        hit_ratio = page_metrics["cache_hit_ratio"]
+        print(
+            f"  {page_type}: {page_metrics['requests']['count']} requests (p50 {page_metrics['requests']['p50_ms']:.0f} ms, p99 {page_metrics['requests']['p99_ms']:.0f} ms), "
+            f"cache hit ratio {'-' if hit_ratio is None else f'{hit_ratio:.0%}'}, parse p50 {page_metrics['parse']['p50_ms']:.1f} ms"
+        )
+
+    metrics.write_json(metrics_file)
+    if prometheus_file is not None:
+        metrics.write_prometheus(prometheus_file)
+
+async def main(incremental: bool = False, prometheus_file: str | None = None):
+    start_crawl()
+    output = output_class(output_format)(output_dir)
+    connector = aiohttp.TCPConnector(limit=max_in_flight_requests)
+    sem = asyncio.Semaphore(max_in_flight_requests)
+    limiter = HostLimiter(cards_rate_limit, cards_burst, cards_max_per_host)
+    journal = CrawlJournal(crawl_journal_file)
+
+    page_cache.evict(cache_policies, cache_max_size)
+
+    async with aiohttp.ClientSession(base_url=base_url, connector=connector) as session:
+        with metrics.stage("tournaments"):
+            await handle_tournament_list_pages(session, sem, output, load_crawl_state(), journal, incremental)
+
+        with metrics.stage("cards"):
+            cards_data = await scrape_cards(session, sem, limiter)
+
+    output.close()
+    page_cache.close()
+    parser_pool.close()
+    journal.close()
+    report_metrics(prometheus_file)
+
+    if cards_data is None:
+        return
 
     with open(cards_output_file, "w", encoding="utf-8") as f:
         json.dump(cards_data, f, indent=2, ensure_ascii=False)
@@ -452,4 +827,11 @@ async def main():
     print("\n Scraping terminé. Fichier généré : pokemon_cards.json")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect Pokémon TCG Pocket tournaments and cards from limitlesstcg.com")
+    parser.add_argument("--incremental", action="store_true", help="stop paging at the first page listing only already collected tournaments")
+    parser.add_argument("--output-format", choices=output_formats, default=output_format, help="format of the tournaments output (default: %(default)s)")
+    parser.add_argument("--prometheus-file", help="also write the crawl metrics to this file in Prometheus text format")
+    args = parser.parse_args()
+
+    output_format = args.output_format
+    asyncio.run(main(args.incremental, args.prometheus_file))
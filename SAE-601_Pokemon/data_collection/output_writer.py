@@ -0,0 +1,149 @@
+from dataclasses import asdict
+import json
+import os
+import re
+import shutil
+
+# Plain dicts of the crawled dataclasses, in the field order asdict gives, without the deep copy
+# asdict makes of every nested list
+def player_record(player) -> dict:
+    return {
+        "id": player.id,
+        "name": player.name,
+        "placing": player.placing,
+        "country": player.country,
+        "decklist": [{"type": card.type, "url": card.url, "name": card.name, "count": card.count} for card in player.decklist],
+    }
+
+def match_record(match) -> dict:
+    return {"match_results": [{"player_id": result.player_id, "score": result.score} for result in match.match_results]}
+
+# Write a tournament JSON file player by player, so that a whole tournament never sits in memory.
+# The file is written under a temporary name and only committed when complete, so an interrupted
+# crawl never leaves a truncated tournament in output
+class TournamentJsonWriter:
+    item_separator, key_separator = ", ", ": "
+
+    def __init__(self, path: str, tournament, tmp_path: str | None = None):
+        self.path = path
+        self.tmp_path = tmp_path or path + ".tmp"
+        self.nb_players = 0
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+
+        # Tournament fields, then the players array left open
+        header = asdict(tournament)
+        del header["players"], header["matches"]
+        self.file.write(self.dumps(header)[:-1] + f'{self.item_separator}"players"{self.key_separator}[')
+
+    def dumps(self, value) -> str:
+        return json.dumps(value, separators=(self.item_separator, self.key_separator))
+
+    def write_player(self, player):
+        if self.nb_players > 0:
+            self.file.write(self.item_separator)
+        self.file.write(self.dumps(player_record(player)))
+        self.nb_players += 1
+
+    def write_matches(self, matches):
+        self.file.write(f']{self.item_separator}"matches"{self.key_separator}')
+        self.file.write(self.dumps([match_record(match) for match in matches]))
+        self.file.write("}")
+
+    def commit(self):
+        os.replace(self.tmp_path, self.path)
+
+    # Give up the tournament and remove its partial file
+    def discard(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.file.closed:
+            return
+
+        self.file.close()
+        if exc_type is None:
+            self.commit()
+        else:
+            os.remove(self.tmp_path)
+
+# Same streaming as TournamentJsonWriter with compact separators, the finished tournament being
+# appended as one line of a shared NDJSON file. Commits run on the event loop thread, so the
+# lines of concurrently extracted tournaments never interleave
+class TournamentNdjsonWriter(TournamentJsonWriter):
+    item_separator, key_separator = ",", ":"
+
+    def __init__(self, path: str, tournament, written_ids: set[str]):
+        super().__init__(path, tournament, f"{path}.{tournament.id}.tmp")
+        self.tournament_id = tournament.id
+        self.written_ids = written_ids
+
+    def commit(self):
+        with open(self.tmp_path, encoding="utf-8") as src, open(self.path, "a", encoding="utf-8") as dst:
+            shutil.copyfileobj(src, dst)
+            dst.write("\n")
+        os.remove(self.tmp_path)
+        self.written_ids.add(self.tournament_id)
+
+# Output of the crawl, one class per format. Each one tells whether a tournament is already in output
+# and opens the writer of a new tournament; close() runs once the crawl is over
+
+# One JSON file per tournament (historical format)
+class JsonOutput:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def contains(self, tournament_id: str) -> bool:
+        return os.path.isfile(os.path.join(self.directory, f"{tournament_id}.json"))
+
+    def writer(self, tournament) -> TournamentJsonWriter:
+        return TournamentJsonWriter(os.path.join(self.directory, f"{tournament.id}.json"), tournament)
+
+    def close(self):
+        pass
+
+# A single tournaments.ndjson file, one compact JSON line per tournament
+regex_ndjson_id = re.compile(rb'\{"id":("(?:[^"\\]|\\.)*")')
+
+class NdjsonOutput:
+    filename = "tournaments.ndjson"
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, self.filename)
+        self.written_ids = set()
+        if not os.path.isfile(self.path):
+            return
+
+        # The id is the first field of each line, no need to decode whole tournaments.
+        # A last line cut by a crash is dropped, so that the next tournament starts on its own line
+        with open(self.path, "rb+") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    f.truncate(f.tell() - len(line))
+                    break
+
+                match = regex_ndjson_id.match(line)
+                if match is not None:
+                    self.written_ids.add(json.loads(match.group(1)))
+
+    def contains(self, tournament_id: str) -> bool:
+        return tournament_id in self.written_ids
+
+    def writer(self, tournament) -> TournamentNdjsonWriter:
+        return TournamentNdjsonWriter(self.path, tournament, self.written_ids)
+
+    def close(self):
+        pass
+
+output_formats = ("json", "ndjson", "parquet")
+
+# Output class of a format. The Parquet output is only imported when it is chosen, pyarrow being
+# an optional (and heavy) dependency
+def output_class(output_format: str):
+    if output_format == "parquet":
+        from parquet_output import ParquetOutput
+        return ParquetOutput
+    return {"json": JsonOutput, "ndjson": NdjsonOutput}[output_format]
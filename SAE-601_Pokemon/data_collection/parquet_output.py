@@ -0,0 +1,183 @@
+import glob
+import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Tables of the columnar output. Card type, URL and name repeat across every decklist, they are
+# dictionary encoded (one copy of each distinct value per file, the rows only hold indices)
+parquet_tables = ("tournaments", "players", "decklists", "matches")
+
+dictionary_string = pa.dictionary(pa.int32(), pa.string())
+
+parquet_schemas = {
+    "tournaments": pa.schema([
+        ("id", pa.string()), ("name", pa.string()), ("date", pa.string()),
+        ("organizer", pa.string()), ("format", pa.string()), ("nb_players", pa.int32()),
+    ]),
+    "players": pa.schema([
+        ("tournament_id", pa.string()), ("id", pa.string()), ("name", pa.string()),
+        ("placing", pa.int32()), ("country", pa.string()),
+    ]),
+    "decklists": pa.schema([
+        ("tournament_id", pa.string()), ("player_id", pa.string()), ("card_type", dictionary_string),
+        ("card_url", dictionary_string), ("card_name", dictionary_string), ("card_count", pa.int32()),
+    ]),
+    "matches": pa.schema([
+        ("tournament_id", pa.string()), ("match_index", pa.int32()), ("player_id", pa.string()), ("score", pa.int32()),
+    ]),
+}
+
+# Placings and player counts come from HTML attributes and may be empty or missing: they are
+# stored as nullable integers instead of failing the tournament
+def nullable_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# Rows of a part file buffered before being written as one record batch
+parquet_batch_rows = 4096
+
+# Stream the rows of one tournament into one Parquet part file per table, written as .tmp files in record batches
+# of parquet_batch_rows rows, so memory does not grow with the tournament size. The parts are renamed on commit,
+# the tournaments part last: a tournament is in output once it exists
+class TournamentParquetWriter:
+    def __init__(self, directory: str, tournament, written_ids: set[str]):
+        self.directory = directory
+        self.tournament = tournament
+        self.written_ids = written_ids
+        self.nb_players = 0
+        self.discarded = False
+        self.writers = {}
+        self.columns = {}
+        for table in ("players", "decklists", "matches"):
+            self.writers[table] = pq.ParquetWriter(self.part_path(table) + ".tmp", parquet_schemas[table])
+            self.columns[table] = {name: [] for name in parquet_schemas[table].names}
+
+    def part_path(self, table: str) -> str:
+        return os.path.join(self.directory, table, f"{self.tournament.id}.parquet")
+
+    def append(self, table: str, **values):
+        columns = self.columns[table]
+        for name, value in values.items():
+            columns[name].append(value)
+        if len(columns[name]) >= parquet_batch_rows:
+            self.flush(table)
+
+    def flush(self, table: str):
+        columns = self.columns[table]
+        if columns[parquet_schemas[table].names[0]]:
+            self.writers[table].write_batch(pa.record_batch(columns, schema=parquet_schemas[table]))
+            for values in columns.values():
+                values.clear()
+
+    def write_player(self, player):
+        tournament_id = self.tournament.id
+        self.append("players", tournament_id=tournament_id, id=player.id, name=player.name, placing=nullable_int(player.placing), country=player.country)
+        for card in player.decklist:
+            self.append("decklists", tournament_id=tournament_id, player_id=player.id, card_type=card.type, card_url=card.url, card_name=card.name, card_count=card.count)
+        self.nb_players += 1
+
+    def write_matches(self, matches):
+        for index, match in enumerate(matches):
+            for result in match.match_results:
+                self.append("matches", tournament_id=self.tournament.id, match_index=index, player_id=result.player_id, score=result.score)
+
+    def commit(self):
+        for table, writer in self.writers.items():
+            self.flush(table)
+            writer.close()
+            os.replace(self.part_path(table) + ".tmp", self.part_path(table))
+
+        tournament = self.tournament
+        path = self.part_path("tournaments")
+        pq.write_table(pa.table({
+            "id": [tournament.id], "name": [tournament.name], "date": [tournament.date],
+            "organizer": [tournament.organizer], "format": [tournament.format], "nb_players": [nullable_int(tournament.nb_players)],
+        }, schema=parquet_schemas["tournaments"]), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.written_ids.add(tournament.id)
+
+    # Drop the .tmp parts of a tournament that is not written
+    def abort(self):
+        for table, writer in self.writers.items():
+            writer.close()
+            os.remove(self.part_path(table) + ".tmp")
+
+    def discard(self):
+        self.discarded = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and not self.discarded:
+            self.commit()
+        else:
+            self.abort()
+
+# A Parquet dataset under parquet/<table>/. Each tournament is written as small part files while crawling,
+# close() merges them into one batch file per table, so that a dataset holds a few large files
+class ParquetOutput:
+    subdirectory = "parquet"
+
+    def __init__(self, directory: str):
+        self.directory = os.path.join(directory, self.subdirectory)
+        for table in parquet_tables:
+            os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+
+        batch_ids = set().union(*self.table_ids("batch-*.parquet"))
+        part_ids = {self.part_id(path) for path in self.part_files("tournaments")} - batch_ids
+
+        # Parts and batches being written when the crawl stopped are incomplete
+        for path in glob.glob(os.path.join(self.directory, "*", "*.tmp")):
+            os.remove(path)
+
+        # Parts left behind by a crash after their batch was written are already in output,
+        # parts of a tournament whose tournaments part is missing come from an interrupted commit
+        for table in parquet_tables:
+            for path in self.part_files(table):
+                if self.part_id(path) not in part_ids:
+                    os.remove(path)
+
+        self.written_ids = batch_ids | part_ids
+
+    @staticmethod
+    def part_id(path: str) -> str:
+        return os.path.basename(path).removesuffix(".parquet")
+
+    def part_files(self, table: str) -> list[str]:
+        return sorted(path for path in glob.glob(os.path.join(self.directory, table, "*.parquet")) if not os.path.basename(path).startswith("batch-"))
+
+    def table_ids(self, pattern: str) -> list[set[str]]:
+        paths = glob.glob(os.path.join(self.directory, "tournaments", pattern))
+        return [set(pq.read_table(path, columns=["id"]).column("id").to_pylist()) for path in paths]
+
+    def contains(self, tournament_id: str) -> bool:
+        return tournament_id in self.written_ids
+
+    def writer(self, tournament) -> TournamentParquetWriter:
+        return TournamentParquetWriter(self.directory, tournament, self.written_ids)
+
+    # Stream the part files of each table into a new batch file, then remove the parts.
+    # Batches are only renamed once all of them are written, the tournaments batch last: until then
+    # the parts stay the reference and the next close() rewrites the same batch name
+    def close(self):
+        part_files = {table: self.part_files(table) for table in parquet_tables}
+        if not part_files["tournaments"]:
+            return
+
+        batch_name = f"batch-{len(glob.glob(os.path.join(self.directory, 'tournaments', 'batch-*.parquet'))):05d}.parquet"
+        for table, paths in part_files.items():
+            batch_path = os.path.join(self.directory, table, batch_name)
+            with pq.ParquetWriter(batch_path + ".tmp", parquet_schemas[table]) as writer:
+                for batch in ds.dataset(paths, schema=parquet_schemas[table], format="parquet").to_batches():
+                    writer.write_batch(batch)
+
+        for table in reversed(parquet_tables):
+            batch_path = os.path.join(self.directory, table, batch_name)
+            os.replace(batch_path + ".tmp", batch_path)
+        for paths in part_files.values():
+            for path in paths:
+                os.remove(path)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+# Token bucket: refills `rate` tokens per second up to `capacity`,
+# each request consumes one token and waits when the bucket is empty
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        async with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+# Per-host limiter: one token bucket and one concurrency cap for each host
+class HostLimiter:
+    def __init__(self, rate: float, burst: int, max_per_host: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_per_host = max_per_host
+        self.buckets: dict[str, TokenBucket] = {}
+        self.semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+            self.semaphores[host] = asyncio.Semaphore(self.max_per_host)
+
+        async with self.semaphores[host]:
+            await self.buckets[host].acquire()
+            yield
@@ -0,0 +1,71 @@
+from email.utils import parsedate_to_datetime
+import aiohttp
+import asyncio
+import random
+import time
+
+# Raised by a page parser when the page does not have the expected structure
+# (the page is then dropped from the cache instead of being kept as valid HTML)
+class UnexpectedPageError(Exception):
+    pass
+
+# Raised instead of sending a request while the circuit breaker of a host is open
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"circuit breaker open for {host}, retrying in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+# Per-host circuit breaker: after `threshold` consecutive failures, requests to the host are
+# refused for `cooldown` seconds, then let through again (one more failure reopens it)
+class CircuitBreaker:
+    def __init__(self, host: str, threshold: int, cooldown: float):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+    def check(self):
+        now = time.monotonic()
+        if now < self.open_until:
+            raise CircuitOpenError(self.host, self.open_until - now)
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.open_until = time.monotonic() + self.cooldown
+
+# Network errors, timeouts, 429 and 5xx responses are worth retrying, other HTTP errors (404...) are not
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError))
+
+# Seconds to wait from a Retry-After header (delay in seconds or HTTP date), None if absent or invalid
+def parse_retry_after(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# Delay before the next attempt: what the server or the circuit breaker asked for if anything,
+# exponential backoff with full jitter otherwise
+def retry_delay(error: Exception, attempt: int, backoff_base: float, backoff_max: float) -> float:
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+
+    if isinstance(error, aiohttp.ClientResponseError) and error.headers is not None:
+        retry_after = parse_retry_after(error.headers.get("Retry-After"))
+        if retry_after is not None:
+            return min(retry_after, backoff_max)
+
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
@@ -0,0 +1,15 @@
+-- Mode incrémental : tables de transit recevant les seuls nouveaux tournois de la collecte
+CREATE UNLOGGED TABLE IF NOT EXISTS public.stg_tournaments (LIKE public.wrk_tournaments);
+CREATE UNLOGGED TABLE IF NOT EXISTS public.stg_decklists (LIKE public.wrk_decklists);
+CREATE UNLOGGED TABLE IF NOT EXISTS public.stg_matches (LIKE public.wrk_matches);
+
+-- Restes d'un chargement interrompu
+TRUNCATE public.stg_tournaments, public.stg_decklists, public.stg_matches;
+
+-- Index des tables dérivées par deck_id, pour ne recalculer que les decks touchés par les nouveaux tournois
+CREATE INDEX IF NOT EXISTS idx_player_decks_deck ON public.wrk_player_decks(deck_id);
+CREATE INDEX IF NOT EXISTS idx_player_decks_player ON public.wrk_player_decks(tournament_id, player_id);
+CREATE INDEX IF NOT EXISTS idx_match_decks_deck ON public.wrk_match_decks(deck_id);
+CREATE INDEX IF NOT EXISTS idx_deck_winrates_deck ON public.wrk_deck_winrates(deck_id);
+CREATE INDEX IF NOT EXISTS idx_deck_versions_deck ON public.wrk_deck_versions(deck_id);
+CREATE INDEX IF NOT EXISTS idx_deck_first_pokemon_deck ON public.wrk_deck_first_pokemon(deck_id);
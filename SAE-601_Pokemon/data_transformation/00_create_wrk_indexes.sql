@@ -0,0 +1,10 @@
+-- Index des tables de travail, créés une fois les tables chargées (plus rapide que de les tenir à jour pendant le COPY)
+CREATE INDEX IF NOT EXISTS idx_decklists_tournament ON public.wrk_decklists(tournament_id);
+CREATE INDEX IF NOT EXISTS idx_decklists_player ON public.wrk_decklists(player_id);
+CREATE INDEX IF NOT EXISTS idx_matches_tournament ON public.wrk_matches(tournament_id);
+CREATE INDEX IF NOT EXISTS idx_matches_player ON public.wrk_matches(player_id);
+
+-- Statistiques à jour pour le planificateur avant les étapes suivantes
+ANALYZE public.wrk_tournaments;
+ANALYZE public.wrk_decklists;
+ANALYZE public.wrk_matches;
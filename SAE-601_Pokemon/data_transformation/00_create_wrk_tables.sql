@@ -2,6 +2,15 @@ DROP TABLE IF EXISTS public.wrk_tournaments;
 DROP TABLE IF EXISTS public.wrk_decklists;
 DROP TABLE IF EXISTS public.wrk_matches;
 DROP TABLE IF EXISTS public.wrk_deck_stats;
+-- Recréée une fois les tables dérivées construites : son absence signale qu'aucune base complète n'est disponible pour le mode incrémental
+DROP TABLE IF EXISTS public.etl_ingested_tournaments;
+-- Tables de transit du mode incrémental, recréées à l'image des tables de travail par 00_create_stg_tables.sql
+DROP TABLE IF EXISTS public.stg_tournaments;
+DROP TABLE IF EXISTS public.stg_decklists;
+DROP TABLE IF EXISTS public.stg_matches;
+-- Faits de l'entrepôt (05_create_star_schema.sql), qui référencent dwh_decks reconstruite par 02_analysis_deck_signatures.sql
+DROP TABLE IF EXISTS public.fact_decklist_cards;
+DROP TABLE IF EXISTS public.fact_matches;
 
 CREATE TABLE public.wrk_tournaments (
   tournament_id varchar,
@@ -18,8 +27,7 @@ CREATE TABLE public.wrk_decklists (
   card_type varchar,
   card_name varchar,
   card_url varchar,
-  card_count int,
-  deck_signature varchar
+  card_count int
 );
 
 CREATE TABLE public.wrk_matches (
@@ -30,15 +38,9 @@ CREATE TABLE public.wrk_matches (
 );
 
 CREATE TABLE public.wrk_deck_stats (
-  deck_signature varchar PRIMARY KEY,
+  deck_id bigint PRIMARY KEY,
   games_played int,
   wins int,
   losses int,
   winrate float
 );
-
-
-CREATE INDEX idx_decklists_tournament ON public.wrk_decklists(tournament_id);
-CREATE INDEX idx_decklists_player ON public.wrk_decklists(player_id);
-CREATE INDEX idx_matches_tournament ON public.wrk_matches(tournament_id);
-CREATE INDEX idx_matches_player ON public.wrk_matches(player_id);
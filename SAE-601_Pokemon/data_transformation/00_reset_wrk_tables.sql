@@ -0,0 +1,8 @@
+-- Tables de travail vidées avant leur chargement, pour que l'étape ingest puisse être relancée seule (--step ingest) ;
+-- leurs index sont retirés pendant le COPY et recréés ensuite par 00_create_wrk_indexes.sql
+DROP INDEX IF EXISTS public.idx_decklists_tournament;
+DROP INDEX IF EXISTS public.idx_decklists_player;
+DROP INDEX IF EXISTS public.idx_matches_tournament;
+DROP INDEX IF EXISTS public.idx_matches_player;
+
+TRUNCATE public.wrk_tournaments, public.wrk_decklists, public.wrk_matches;
@@ -0,0 +1,10 @@
+-- Étape 5 : Première carte Pokémon dans chaque deck
+DROP TABLE IF EXISTS wrk_deck_first_pokemon;
+CREATE TABLE wrk_deck_first_pokemon AS
+SELECT DISTINCT ON (d.deck_id)
+  d.deck_id,
+  l.card_name AS first_pokemon_card_name
+FROM wrk_player_decks d
+JOIN wrk_decklists l ON d.tournament_id = l.tournament_id AND d.player_id = l.player_id
+WHERE l.card_type = 'Pokémon' AND l.card_name LIKE '%(A%'
+ORDER BY d.deck_id, l.card_name;
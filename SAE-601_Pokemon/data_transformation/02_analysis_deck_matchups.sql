@@ -0,0 +1,34 @@
+-- Étape 7 : Matrice des confrontations, calculée en une passe groupée sur les paires de joueurs de chaque match.
+-- Une ligne par deck et deck adverse, dans les deux sens, pour lire directement les confrontations d'un deck
+DROP TABLE IF EXISTS wrk_deck_matchups;
+CREATE TABLE wrk_deck_matchups AS
+SELECT
+  m.deck_id,
+  o.deck_id AS opponent_deck_id,
+  COUNT(*) AS games_played,
+  SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) AS wins,
+  SUM(CASE WHEN m.score = 0 THEN 1 ELSE 0 END) AS losses,
+  ROUND(SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS winrate
+FROM wrk_match_decks m
+JOIN wrk_match_decks o ON o.tournament_id = m.tournament_id AND o.match_id = m.match_id AND o.player_id <> m.player_id
+GROUP BY m.deck_id, o.deck_id;
+
+ALTER TABLE wrk_deck_matchups ADD CONSTRAINT pk_deck_matchups PRIMARY KEY (deck_id, opponent_deck_id);
+
+-- Même matrice par archétype (carte principale du deck, comme dans le tableau de bord), agrégée depuis celle des decks.
+-- Les decks sans carte principale n'y figurent pas
+DROP TABLE IF EXISTS wrk_archetype_matchups;
+CREATE TABLE wrk_archetype_matchups AS
+SELECT
+  f.first_pokemon_card_name AS main_card,
+  fo.first_pokemon_card_name AS opponent_main_card,
+  SUM(x.games_played) AS games_played,
+  SUM(x.wins) AS wins,
+  SUM(x.losses) AS losses,
+  ROUND(SUM(x.wins) * 100.0 / SUM(x.games_played), 2) AS winrate
+FROM wrk_deck_matchups x
+JOIN wrk_deck_first_pokemon f ON f.deck_id = x.deck_id
+JOIN wrk_deck_first_pokemon fo ON fo.deck_id = x.opponent_deck_id
+GROUP BY f.first_pokemon_card_name, fo.first_pokemon_card_name;
+
+ALTER TABLE wrk_archetype_matchups ADD CONSTRAINT pk_archetype_matchups PRIMARY KEY (main_card, opponent_main_card);
@@ -0,0 +1,56 @@
+-- Étape 1 : Signature des decks et dimension des decks
+-- Identifiant d'un deck : les 64 premiers bits du md5 de sa signature (liste des cartes triée par nom).
+-- La signature lisible n'est conservée que dans dwh_decks, les autres tables portent le seul deck_id
+CREATE OR REPLACE FUNCTION deck_id_of(deck_signature text) RETURNS bigint
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$ SELECT ('x' || left(md5(deck_signature), 16))::bit(64)::bigint $$;
+
+CREATE TEMP TABLE player_deck_signatures ON COMMIT DROP AS
+SELECT
+  tournament_id,
+  player_id,
+  deck_signature,
+  deck_id_of(deck_signature) AS deck_id
+FROM (
+  SELECT
+    tournament_id,
+    player_id,
+    STRING_AGG(CONCAT(card_name, ':', card_count), ',' ORDER BY card_name) AS deck_signature
+  FROM wrk_decklists
+  GROUP BY tournament_id, player_id
+) AS signatures;
+
+-- Deux signatures différentes ne doivent jamais partager un deck_id
+DO $$
+DECLARE
+  collision record;
+BEGIN
+  SELECT deck_id, MIN(deck_signature) AS signature_1, MAX(deck_signature) AS signature_2 INTO collision
+  FROM player_deck_signatures
+  GROUP BY deck_id
+  HAVING COUNT(DISTINCT deck_signature) > 1
+  LIMIT 1;
+  IF FOUND THEN
+    RAISE EXCEPTION 'Collision de deck_id % entre les signatures % et %', collision.deck_id, collision.signature_1, collision.signature_2;
+  END IF;
+END $$;
+
+-- CASCADE retire aussi les clés étrangères des faits vers dwh_decks : l'étape star_schema, qui dépend de celle-ci,
+-- recrée les faits et leurs clés
+DROP TABLE IF EXISTS dwh_decks CASCADE;
+CREATE TABLE dwh_decks AS
+SELECT DISTINCT deck_id, deck_signature
+FROM player_deck_signatures;
+
+ALTER TABLE dwh_decks ADD CONSTRAINT pk_dwh_decks PRIMARY KEY (deck_id);
+
+DROP TABLE IF EXISTS wrk_player_decks;
+CREATE TABLE wrk_player_decks AS
+SELECT
+  tournament_id,
+  player_id,
+  deck_id
+FROM player_deck_signatures;
+
+-- Joueurs d'un deck : cartes d'un deck dans le tableau de bord et recalculs du mode incrémental
+CREATE INDEX idx_player_decks_deck ON wrk_player_decks(deck_id);
@@ -0,0 +1,16 @@
+-- Étape 4 : Extraire la version la plus élevée commençant par A
+DROP TABLE IF EXISTS wrk_deck_versions;
+CREATE TABLE wrk_deck_versions AS
+SELECT
+  sub.deck_id,
+  MAX(sub.version_clean) AS version
+FROM (
+  SELECT
+    d.deck_id,
+    REGEXP_REPLACE(SPLIT_PART(card_name, '(', 2), '[^A-Za-z0-9].*', '') AS version_clean
+  FROM wrk_player_decks d
+  JOIN wrk_decklists l ON d.tournament_id = l.tournament_id AND d.player_id = l.player_id
+  WHERE card_name LIKE '%(A%'
+) AS sub
+WHERE sub.version_clean ~ '^A'
+GROUP BY sub.deck_id;
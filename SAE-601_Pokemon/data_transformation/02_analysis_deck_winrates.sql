@@ -0,0 +1,23 @@
+-- Étape 2 : Associer chaque match à un deck
+DROP TABLE IF EXISTS wrk_match_decks;
+CREATE TABLE wrk_match_decks AS
+SELECT
+  m.tournament_id,
+  m.match_id,
+  m.player_id,
+  m.score,
+  d.deck_id
+FROM wrk_matches m
+JOIN wrk_player_decks d ON m.tournament_id = d.tournament_id AND m.player_id = d.player_id;
+
+-- Étape 3 : Calculer winrate par deck
+DROP TABLE IF EXISTS wrk_deck_winrates;
+CREATE TABLE wrk_deck_winrates AS
+SELECT
+  deck_id,
+  COUNT(*) AS games_played,
+  SUM(CASE WHEN score = 2 THEN 1 ELSE 0 END) AS wins,
+  SUM(CASE WHEN score = 0 THEN 1 ELSE 0 END) AS losses,
+  ROUND(SUM(CASE WHEN score = 2 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS winrate
+FROM wrk_match_decks
+GROUP BY deck_id;
@@ -0,0 +1,44 @@
+-- Étape 8 : Cube du métagame par semaine, version de deck et carte principale, à partir des parties de chaque joueur.
+-- La version et la carte principale d'un deck ne dépendent que de ses cartes : le mode incrémental ajoute les parties
+-- des nouveaux tournois aux compteurs existants. meta_share est la part des parties de la semaine
+DROP VIEW IF EXISTS wrk_metagame_rollup;
+DROP TABLE IF EXISTS wrk_metagame_cube;
+CREATE TABLE wrk_metagame_cube AS
+SELECT
+  date_trunc('week', t.tournament_date)::date AS week,
+  v.version AS deck_version,
+  f.first_pokemon_card_name AS main_card,
+  COUNT(*) AS games_played,
+  SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) AS wins,
+  SUM(CASE WHEN m.score = 0 THEN 1 ELSE 0 END) AS losses,
+  ROUND(SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS winrate,
+  ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (PARTITION BY date_trunc('week', t.tournament_date)::date), 2) AS meta_share
+FROM wrk_match_decks m
+JOIN (
+  SELECT DISTINCT ON (tournament_id) tournament_id, tournament_date
+  FROM wrk_tournaments
+  ORDER BY tournament_id
+) t ON t.tournament_id = m.tournament_id
+LEFT JOIN wrk_deck_versions v ON v.deck_id = m.deck_id
+LEFT JOIN wrk_deck_first_pokemon f ON f.deck_id = m.deck_id
+GROUP BY 1, 2, 3;
+
+-- Les tournois sans date et les decks sans version ou sans carte principale gardent leur ligne : une valeur absente
+-- compte comme une valeur, remplacée dans l'index par une valeur sentinelle (UNIQUE NULLS NOT DISTINCT demande PostgreSQL 15).
+-- L'ajout du mode incrémental (05_incremental_update.sql) désigne l'index par les mêmes expressions
+CREATE UNIQUE INDEX uq_metagame_cube ON wrk_metagame_cube (COALESCE(week, '-infinity'::date), COALESCE(deck_version, ''), COALESCE(main_card, ''));
+
+-- Agrégats du cube : par semaine et carte principale, par semaine et version, par semaine, et sur toute la période
+CREATE VIEW wrk_metagame_rollup AS
+SELECT
+  week,
+  deck_version,
+  main_card,
+  GROUPING(week, deck_version, main_card) AS rollup_level,
+  SUM(games_played) AS games_played,
+  SUM(wins) AS wins,
+  SUM(losses) AS losses,
+  ROUND(SUM(wins) * 100.0 / SUM(games_played), 2) AS winrate,
+  ROUND(SUM(games_played) * 100.0 / SUM(SUM(games_played)) OVER (PARTITION BY GROUPING(week, deck_version, main_card), week), 2) AS meta_share
+FROM wrk_metagame_cube
+GROUP BY GROUPING SETS ((week, main_card), (week, deck_version), (week), (main_card), (deck_version), ());
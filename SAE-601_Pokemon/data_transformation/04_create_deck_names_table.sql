@@ -1,7 +1,6 @@
 DROP TABLE IF EXISTS public.deck_names;
 
 CREATE TABLE public.deck_names (
-  deck_signature varchar PRIMARY KEY,
-  formatted_cards text,
+  deck_id bigint PRIMARY KEY,
   deck_name varchar
 );
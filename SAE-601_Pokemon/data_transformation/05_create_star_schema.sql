@@ -0,0 +1,177 @@
+-- Entrepôt en étoile : dimensions à clé entière et faits ne portant que des clés étrangères,
+-- partitionnés par mois de tournoi. dwh_decks (02_analysis_deck_signatures.sql) sert de dimension des decks.
+
+-- Faits d'abord, qui référencent les dimensions (00_create_wrk_tables.sql les supprime aussi, car ils référencent dwh_decks)
+DROP TABLE IF EXISTS public.fact_decklist_cards;
+DROP TABLE IF EXISTS public.fact_matches;
+DROP TABLE IF EXISTS public.dim_card;
+DROP TABLE IF EXISTS public.dim_tournament;
+DROP TABLE IF EXISTS public.dim_player;
+
+-- Dimension des cartes : cartes vues dans les decklists (dwh_cards) et catalogue détaillé (detailed_cards), typés
+CREATE TABLE public.dim_card (
+  card_key int GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  card_name varchar NOT NULL UNIQUE,
+  card_type varchar,
+  card_url varchar,
+  element_type varchar,
+  evolution_stage varchar,
+  hp smallint,
+  rarity varchar,
+  image_url varchar,
+  is_final_evolution boolean
+);
+
+-- Ajoute les nouvelles cartes et met à jour les attributs du catalogue ; appelée aussi par le mode incrémental
+CREATE OR REPLACE FUNCTION refresh_dim_card() RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO public.dim_card (card_name, card_type, card_url, element_type, evolution_stage, hp, rarity, image_url, is_final_evolution)
+  SELECT
+    COALESCE(c.card_name, d.card_name),
+    COALESCE(c.card_type, CASE WHEN d.evolution_stage IN ('Basic', 'Stage 1', 'Stage 2') THEN 'Pokémon' ELSE 'Trainer' END),
+    COALESCE(c.card_url, d.url),
+    NULLIF(d.element_type, 'N/A'),
+    NULLIF(d.evolution_stage, 'N/A'),
+    CASE WHEN d.hp ~ '^[0-9]{1,4}$' THEN d.hp::smallint END,
+    NULLIF(d.rarity, 'N/A'),
+    NULLIF(d.image_url, 'N/A'),
+    d.is_final_evolution
+  FROM (
+    SELECT DISTINCT ON (card_name) card_name, card_type, card_url
+    FROM public.dwh_cards
+    WHERE card_name IS NOT NULL
+    ORDER BY card_name, card_type, card_url
+  ) AS c
+  FULL JOIN (
+    SELECT DISTINCT ON (card_name) *
+    FROM public.detailed_cards
+    WHERE card_name IS NOT NULL
+    ORDER BY card_name
+  ) AS d ON d.card_name = c.card_name
+  ON CONFLICT (card_name) DO UPDATE SET
+    card_type = COALESCE(dim_card.card_type, EXCLUDED.card_type),
+    card_url = COALESCE(dim_card.card_url, EXCLUDED.card_url),
+    element_type = EXCLUDED.element_type,
+    evolution_stage = EXCLUDED.evolution_stage,
+    hp = EXCLUDED.hp,
+    rarity = EXCLUDED.rarity,
+    image_url = EXCLUDED.image_url,
+    is_final_evolution = EXCLUDED.is_final_evolution;
+$$;
+
+SELECT refresh_dim_card();
+
+-- Dimension des tournois, avec le mois qui sert de clé de partition aux faits
+CREATE TABLE public.dim_tournament (
+  tournament_key int GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  tournament_id varchar NOT NULL UNIQUE,
+  tournament_name varchar,
+  tournament_date timestamp,
+  tournament_month date,
+  tournament_organizer varchar,
+  tournament_format varchar,
+  tournament_nb_players int
+);
+
+INSERT INTO public.dim_tournament (tournament_id, tournament_name, tournament_date, tournament_month, tournament_organizer, tournament_format, tournament_nb_players)
+SELECT DISTINCT ON (tournament_id)
+  tournament_id, tournament_name, tournament_date, date_trunc('month', tournament_date)::date,
+  tournament_organizer, tournament_format, tournament_nb_players
+FROM public.wrk_tournaments
+ORDER BY tournament_id;
+
+-- Dimension des joueurs (identifiants normalisés de la collecte)
+CREATE TABLE public.dim_player (
+  player_key int GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  player_id varchar NOT NULL UNIQUE
+);
+
+INSERT INTO public.dim_player (player_id)
+SELECT player_id FROM public.wrk_decklists
+UNION
+SELECT player_id FROM public.wrk_matches;
+
+-- Faits : une ligne par carte d'une decklist, une ligne par joueur d'un match (deck_id nul si le joueur n'a pas de decklist)
+CREATE TABLE public.fact_decklist_cards (
+  tournament_month date,
+  tournament_key int NOT NULL,
+  player_key int NOT NULL,
+  deck_id bigint,
+  card_key int NOT NULL,
+  card_count smallint
+) PARTITION BY RANGE (tournament_month);
+
+CREATE TABLE public.fact_matches (
+  tournament_month date,
+  tournament_key int NOT NULL,
+  match_id int NOT NULL,
+  player_key int NOT NULL,
+  deck_id bigint,
+  score smallint
+) PARTITION BY RANGE (tournament_month);
+
+-- Une partition par mois de tournoi (plus une partition par défaut pour les tournois sans date) ;
+-- appelée aussi par le mode incrémental pour les nouveaux mois
+CREATE OR REPLACE FUNCTION create_fact_partitions() RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  fact text;
+  month date;
+BEGIN
+  FOREACH fact IN ARRAY ARRAY['fact_decklist_cards', 'fact_matches'] LOOP
+    EXECUTE format('CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.%I DEFAULT', fact || '_default', fact);
+    FOR month IN SELECT DISTINCT tournament_month FROM public.dim_tournament WHERE tournament_month IS NOT NULL LOOP
+      IF to_regclass(format('public.%I', fact || '_' || to_char(month, 'YYYY_MM'))) IS NULL THEN
+        EXECUTE format('CREATE TABLE public.%I PARTITION OF public.%I FOR VALUES FROM (%L) TO (%L)',
+                       fact || '_' || to_char(month, 'YYYY_MM'), fact, month, (month + interval '1 month')::date);
+      END IF;
+    END LOOP;
+  END LOOP;
+END $$;
+
+SELECT create_fact_partitions();
+
+INSERT INTO public.fact_decklist_cards
+SELECT t.tournament_month, t.tournament_key, p.player_key, pd.deck_id, c.card_key, l.card_count
+FROM public.wrk_decklists l
+JOIN public.dim_tournament t ON t.tournament_id = l.tournament_id
+JOIN public.dim_player p ON p.player_id = l.player_id
+JOIN public.dim_card c ON c.card_name = l.card_name
+LEFT JOIN public.wrk_player_decks pd ON pd.tournament_id = l.tournament_id AND pd.player_id = l.player_id;
+
+INSERT INTO public.fact_matches
+SELECT t.tournament_month, t.tournament_key, m.match_id, p.player_key, pd.deck_id, m.score
+FROM public.wrk_matches m
+JOIN public.dim_tournament t ON t.tournament_id = m.tournament_id
+JOIN public.dim_player p ON p.player_id = m.player_id
+LEFT JOIN public.wrk_player_decks pd ON pd.tournament_id = m.tournament_id AND pd.player_id = m.player_id;
+
+-- Clés étrangères et index ajoutés aux tables partitionnées une fois chargées (répercutés sur chaque partition) :
+-- les clés sont vérifiées en une requête plutôt que ligne à ligne pendant le chargement
+ALTER TABLE public.fact_decklist_cards
+  ADD FOREIGN KEY (tournament_key) REFERENCES public.dim_tournament,
+  ADD FOREIGN KEY (player_key) REFERENCES public.dim_player,
+  ADD FOREIGN KEY (deck_id) REFERENCES public.dwh_decks,
+  ADD FOREIGN KEY (card_key) REFERENCES public.dim_card;
+
+ALTER TABLE public.fact_matches
+  ADD FOREIGN KEY (tournament_key) REFERENCES public.dim_tournament,
+  ADD FOREIGN KEY (player_key) REFERENCES public.dim_player,
+  ADD FOREIGN KEY (deck_id) REFERENCES public.dwh_decks;
+
+
+CREATE INDEX idx_fact_decklist_cards_player ON public.fact_decklist_cards(tournament_key, player_key);
+CREATE INDEX idx_fact_decklist_cards_card ON public.fact_decklist_cards(card_key);
+CREATE INDEX idx_fact_decklist_cards_deck ON public.fact_decklist_cards(deck_id);
+CREATE INDEX idx_fact_matches_match ON public.fact_matches(tournament_key, match_id);
+CREATE INDEX idx_fact_matches_player ON public.fact_matches(player_key);
+CREATE INDEX idx_fact_matches_deck ON public.fact_matches(deck_id);
+CREATE INDEX idx_dim_tournament_month ON public.dim_tournament(tournament_month);
+
+ANALYZE public.dim_card;
+ANALYZE public.dim_tournament;
+ANALYZE public.dim_player;
+ANALYZE public.fact_decklist_cards;
+ANALYZE public.fact_matches;
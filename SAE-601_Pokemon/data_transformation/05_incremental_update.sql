@@ -0,0 +1,262 @@
+-- Mode incrémental : intègre les tournois chargés dans les tables stg_* et met à jour les tables dérivées
+-- des seuls decks concernés. Le script s'exécute dans une seule transaction.
+
+-- Garde contre un double chargement : seuls les tournois encore inconnus sont intégrés
+DELETE FROM stg_tournaments s USING etl_ingested_tournaments e WHERE s.tournament_id = e.tournament_id;
+DELETE FROM stg_decklists s USING etl_ingested_tournaments e WHERE s.tournament_id = e.tournament_id;
+DELETE FROM stg_matches s USING etl_ingested_tournaments e WHERE s.tournament_id = e.tournament_id;
+
+-- Tables de travail
+INSERT INTO wrk_tournaments SELECT * FROM stg_tournaments;
+INSERT INTO wrk_decklists SELECT * FROM stg_decklists;
+INSERT INTO wrk_matches SELECT * FROM stg_matches;
+
+-- Dimension des cartes (01_dwh_cards.sql) : nouvelles cartes seulement
+INSERT INTO dwh_cards (card_type, card_name, card_url)
+SELECT card_type, card_name, card_url FROM stg_decklists
+EXCEPT
+SELECT card_type, card_name, card_url FROM dwh_cards;
+
+-- Étapes 1 et 2 (02_analysis_deck_signatures.sql, 02_analysis_deck_winrates.sql) pour les nouveaux tournois
+CREATE TEMP TABLE new_player_decks ON COMMIT DROP AS
+SELECT
+  tournament_id,
+  player_id,
+  deck_signature,
+  deck_id_of(deck_signature) AS deck_id
+FROM (
+  SELECT
+    tournament_id,
+    player_id,
+    STRING_AGG(CONCAT(card_name, ':', card_count), ',' ORDER BY card_name) AS deck_signature
+  FROM stg_decklists
+  GROUP BY tournament_id, player_id
+) AS signatures;
+
+-- Deux signatures différentes ne doivent jamais partager un deck_id, y compris avec un deck déjà connu
+DO $$
+DECLARE
+  collision record;
+BEGIN
+  SELECT n.deck_id, n.deck_signature AS signature_1, d.deck_signature AS signature_2 INTO collision
+  FROM new_player_decks n
+  JOIN dwh_decks d ON d.deck_id = n.deck_id AND d.deck_signature <> n.deck_signature
+  LIMIT 1;
+  IF NOT FOUND THEN
+    SELECT deck_id, MIN(deck_signature) AS signature_1, MAX(deck_signature) AS signature_2 INTO collision
+    FROM new_player_decks
+    GROUP BY deck_id
+    HAVING COUNT(DISTINCT deck_signature) > 1
+    LIMIT 1;
+  END IF;
+  IF FOUND THEN
+    RAISE EXCEPTION 'Collision de deck_id % entre les signatures % et %', collision.deck_id, collision.signature_1, collision.signature_2;
+  END IF;
+END $$;
+
+INSERT INTO dwh_decks (deck_id, deck_signature)
+SELECT DISTINCT deck_id, deck_signature FROM new_player_decks
+ON CONFLICT (deck_id) DO NOTHING;
+
+INSERT INTO wrk_player_decks (tournament_id, player_id, deck_id)
+SELECT tournament_id, player_id, deck_id FROM new_player_decks;
+
+CREATE TEMP TABLE new_match_decks ON COMMIT DROP AS
+SELECT
+  m.tournament_id,
+  m.match_id,
+  m.player_id,
+  m.score,
+  d.deck_id
+FROM stg_matches m
+JOIN new_player_decks d ON m.tournament_id = d.tournament_id AND m.player_id = d.player_id;
+
+INSERT INTO wrk_match_decks SELECT * FROM new_match_decks;
+
+-- Decks dont les agrégats changent : ceux joués dans les nouveaux tournois, tous tournois confondus
+CREATE TEMP TABLE affected_decks ON COMMIT DROP AS
+SELECT DISTINCT deck_id FROM new_player_decks;
+
+-- Étapes 3 à 6 recalculées pour ces decks uniquement (étapes 7 et 8, additives, plus bas)
+DELETE FROM wrk_deck_winrates WHERE deck_id IN (SELECT deck_id FROM affected_decks);
+INSERT INTO wrk_deck_winrates
+SELECT
+  deck_id,
+  COUNT(*) AS games_played,
+  SUM(CASE WHEN score = 2 THEN 1 ELSE 0 END) AS wins,
+  SUM(CASE WHEN score = 0 THEN 1 ELSE 0 END) AS losses,
+  ROUND(SUM(CASE WHEN score = 2 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS winrate
+FROM wrk_match_decks
+WHERE deck_id IN (SELECT deck_id FROM affected_decks)
+GROUP BY deck_id;
+
+DELETE FROM wrk_deck_versions WHERE deck_id IN (SELECT deck_id FROM affected_decks);
+INSERT INTO wrk_deck_versions
+SELECT
+  sub.deck_id,
+  MAX(sub.version_clean) AS version
+FROM (
+  SELECT
+    d.deck_id,
+    REGEXP_REPLACE(SPLIT_PART(card_name, '(', 2), '[^A-Za-z0-9].*', '') AS version_clean
+  FROM wrk_player_decks d
+  JOIN wrk_decklists l ON d.tournament_id = l.tournament_id AND d.player_id = l.player_id
+  WHERE card_name LIKE '%(A%' AND d.deck_id IN (SELECT deck_id FROM affected_decks)
+) AS sub
+WHERE sub.version_clean ~ '^A'
+GROUP BY sub.deck_id;
+
+DELETE FROM wrk_deck_first_pokemon WHERE deck_id IN (SELECT deck_id FROM affected_decks);
+INSERT INTO wrk_deck_first_pokemon
+SELECT DISTINCT ON (d.deck_id)
+  d.deck_id,
+  l.card_name AS first_pokemon_card_name
+FROM wrk_player_decks d
+JOIN wrk_decklists l ON d.tournament_id = l.tournament_id AND d.player_id = l.player_id
+WHERE l.card_type = 'Pokémon' AND l.card_name LIKE '%(A%' AND d.deck_id IN (SELECT deck_id FROM affected_decks)
+ORDER BY d.deck_id, l.card_name;
+
+DELETE FROM wrk_deck_stats WHERE deck_id IN (SELECT deck_id FROM affected_decks);
+INSERT INTO wrk_deck_stats
+SELECT
+  w.deck_id,
+  w.games_played,
+  w.wins,
+  w.losses,
+  w.winrate,
+  v.version AS deck_version,
+  f.first_pokemon_card_name
+FROM wrk_deck_winrates w
+LEFT JOIN wrk_deck_versions v ON w.deck_id = v.deck_id
+LEFT JOIN wrk_deck_first_pokemon f ON w.deck_id = f.deck_id
+WHERE w.deck_id IN (SELECT deck_id FROM affected_decks);
+
+-- Recherche de decks (09_create_deck_search.sql) : statistiques affichées des decks déjà indexés.
+-- Les nouveaux decks sont ajoutés une fois nommés, par 09_update_deck_search.sql
+UPDATE public.deck_search x
+SET deck_version = s.deck_version,
+    games_played = s.games_played,
+    winrate = s.winrate
+FROM wrk_deck_stats s
+WHERE s.deck_id = x.deck_id
+  AND x.deck_id IN (SELECT deck_id FROM affected_decks);
+
+-- Étape 7 : confrontations des nouveaux matchs (les deux joueurs d'un match sont du même tournoi), ajoutées aux compteurs existants.
+-- La carte principale d'un deck ne dépend que de ses cartes, l'archétype des confrontations déjà comptées ne change donc pas
+CREATE TEMP TABLE new_deck_matchups ON COMMIT DROP AS
+SELECT
+  m.deck_id,
+  o.deck_id AS opponent_deck_id,
+  COUNT(*) AS games_played,
+  SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) AS wins,
+  SUM(CASE WHEN m.score = 0 THEN 1 ELSE 0 END) AS losses
+FROM new_match_decks m
+JOIN new_match_decks o ON o.tournament_id = m.tournament_id AND o.match_id = m.match_id AND o.player_id <> m.player_id
+GROUP BY m.deck_id, o.deck_id;
+
+INSERT INTO wrk_deck_matchups AS x (deck_id, opponent_deck_id, games_played, wins, losses, winrate)
+SELECT deck_id, opponent_deck_id, games_played, wins, losses, ROUND(wins * 100.0 / games_played, 2)
+FROM new_deck_matchups
+ON CONFLICT (deck_id, opponent_deck_id) DO UPDATE SET
+  games_played = x.games_played + EXCLUDED.games_played,
+  wins = x.wins + EXCLUDED.wins,
+  losses = x.losses + EXCLUDED.losses,
+  winrate = ROUND((x.wins + EXCLUDED.wins) * 100.0 / (x.games_played + EXCLUDED.games_played), 2);
+
+INSERT INTO wrk_archetype_matchups AS x (main_card, opponent_main_card, games_played, wins, losses, winrate)
+SELECT
+  f.first_pokemon_card_name,
+  fo.first_pokemon_card_name,
+  SUM(n.games_played),
+  SUM(n.wins),
+  SUM(n.losses),
+  ROUND(SUM(n.wins) * 100.0 / SUM(n.games_played), 2)
+FROM new_deck_matchups n
+JOIN wrk_deck_first_pokemon f ON f.deck_id = n.deck_id
+JOIN wrk_deck_first_pokemon fo ON fo.deck_id = n.opponent_deck_id
+GROUP BY f.first_pokemon_card_name, fo.first_pokemon_card_name
+ON CONFLICT (main_card, opponent_main_card) DO UPDATE SET
+  games_played = x.games_played + EXCLUDED.games_played,
+  wins = x.wins + EXCLUDED.wins,
+  losses = x.losses + EXCLUDED.losses,
+  winrate = ROUND((x.wins + EXCLUDED.wins) * 100.0 / (x.games_played + EXCLUDED.games_played), 2);
+
+-- Étape 8 : parties des nouveaux tournois ajoutées au cube du métagame, puis winrate des lignes modifiées
+-- et part du métagame des semaines concernées recalculés
+CREATE TEMP TABLE new_metagame_cube ON COMMIT DROP AS
+SELECT
+  date_trunc('week', t.tournament_date)::date AS week,
+  v.version AS deck_version,
+  f.first_pokemon_card_name AS main_card,
+  COUNT(*) AS games_played,
+  SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) AS wins,
+  SUM(CASE WHEN m.score = 0 THEN 1 ELSE 0 END) AS losses
+FROM new_match_decks m
+JOIN (
+  SELECT DISTINCT ON (tournament_id) tournament_id, tournament_date
+  FROM stg_tournaments
+  ORDER BY tournament_id
+) t ON t.tournament_id = m.tournament_id
+LEFT JOIN wrk_deck_versions v ON v.deck_id = m.deck_id
+LEFT JOIN wrk_deck_first_pokemon f ON f.deck_id = m.deck_id
+GROUP BY 1, 2, 3;
+
+INSERT INTO wrk_metagame_cube AS c (week, deck_version, main_card, games_played, wins, losses, winrate)
+SELECT week, deck_version, main_card, games_played, wins, losses, ROUND(wins * 100.0 / games_played, 2)
+FROM new_metagame_cube
+ON CONFLICT ((COALESCE(week, '-infinity'::date)), (COALESCE(deck_version, '')), (COALESCE(main_card, ''))) DO UPDATE SET
+  games_played = c.games_played + EXCLUDED.games_played,
+  wins = c.wins + EXCLUDED.wins,
+  losses = c.losses + EXCLUDED.losses,
+  winrate = ROUND((c.wins + EXCLUDED.wins) * 100.0 / (c.games_played + EXCLUDED.games_played), 2);
+
+UPDATE wrk_metagame_cube c
+SET meta_share = ROUND(c.games_played * 100.0 / w.total_games, 2)
+FROM (
+  SELECT week, SUM(games_played) AS total_games
+  FROM wrk_metagame_cube
+  WHERE week IN (SELECT week FROM new_metagame_cube) OR (week IS NULL AND EXISTS (SELECT 1 FROM new_metagame_cube WHERE week IS NULL))
+  GROUP BY week
+) w
+WHERE c.week IS NOT DISTINCT FROM w.week;
+
+-- Entrepôt en étoile (05_create_star_schema.sql) : nouvelles lignes des dimensions, partitions des nouveaux mois, puis faits
+INSERT INTO dim_tournament (tournament_id, tournament_name, tournament_date, tournament_month, tournament_organizer, tournament_format, tournament_nb_players)
+SELECT DISTINCT ON (tournament_id)
+  tournament_id, tournament_name, tournament_date, date_trunc('month', tournament_date)::date,
+  tournament_organizer, tournament_format, tournament_nb_players
+FROM stg_tournaments
+ORDER BY tournament_id
+ON CONFLICT (tournament_id) DO NOTHING;
+
+INSERT INTO dim_player (player_id)
+SELECT player_id FROM stg_decklists
+UNION
+SELECT player_id FROM stg_matches
+ON CONFLICT (player_id) DO NOTHING;
+
+SELECT refresh_dim_card();
+
+SELECT create_fact_partitions();
+
+INSERT INTO fact_decklist_cards
+SELECT t.tournament_month, t.tournament_key, p.player_key, pd.deck_id, c.card_key, l.card_count
+FROM stg_decklists l
+JOIN dim_tournament t ON t.tournament_id = l.tournament_id
+JOIN dim_player p ON p.player_id = l.player_id
+JOIN dim_card c ON c.card_name = l.card_name
+LEFT JOIN new_player_decks pd ON pd.tournament_id = l.tournament_id AND pd.player_id = l.player_id;
+
+INSERT INTO fact_matches
+SELECT t.tournament_month, t.tournament_key, m.match_id, p.player_key, pd.deck_id, m.score
+FROM stg_matches m
+JOIN dim_tournament t ON t.tournament_id = m.tournament_id
+JOIN dim_player p ON p.player_id = m.player_id
+LEFT JOIN new_player_decks pd ON pd.tournament_id = m.tournament_id AND pd.player_id = m.player_id;
+
+-- Tournois intégrés (leurs decks restent à nommer), puis tables de transit vidées
+INSERT INTO etl_ingested_tournaments (tournament_id)
+SELECT tournament_id FROM stg_tournaments
+ON CONFLICT (tournament_id) DO NOTHING;
+
+TRUNCATE stg_tournaments, stg_decklists, stg_matches;
@@ -0,0 +1,12 @@
+-- Tournois intégrés à la base, pour que le mode incrémental ne charge que les nouveaux.
+-- decks_named passe à vrai une fois les decks du tournoi ajoutés à deck_names
+DROP TABLE IF EXISTS public.etl_ingested_tournaments;
+
+CREATE TABLE public.etl_ingested_tournaments (
+  tournament_id varchar PRIMARY KEY,
+  ingested_at timestamp NOT NULL DEFAULT now(),
+  decks_named boolean NOT NULL DEFAULT FALSE
+);
+
+INSERT INTO public.etl_ingested_tournaments (tournament_id)
+SELECT DISTINCT tournament_id FROM public.wrk_tournaments;
@@ -0,0 +1,21 @@
+-- Statistiques agrégées par archétype : decks regroupés, parties, victoires et défaites cumulées
+CREATE INDEX IF NOT EXISTS idx_deck_archetypes_archetype_id ON deck_archetypes (archetype_id);
+
+DROP TABLE IF EXISTS wrk_archetype_stats;
+CREATE TABLE wrk_archetype_stats AS
+SELECT
+  a.archetype_id,
+  COUNT(*) AS nb_decks,
+  COALESCE(SUM(w.games_played), 0) AS games_played,
+  COALESCE(SUM(w.wins), 0) AS wins,
+  COALESCE(SUM(w.losses), 0) AS losses,
+  ROUND(SUM(w.wins) * 100.0 / NULLIF(SUM(w.games_played), 0), 2) AS winrate,
+  MIN(f.first_pokemon_card_name) FILTER (WHERE a.deck_id = a.archetype_id) AS main_card
+FROM deck_archetypes a
+LEFT JOIN wrk_deck_winrates w ON w.deck_id = a.deck_id
+LEFT JOIN wrk_deck_first_pokemon f ON f.deck_id = a.deck_id
+GROUP BY a.archetype_id;
+
+ALTER TABLE wrk_archetype_stats ADD CONSTRAINT pk_archetype_stats PRIMARY KEY (archetype_id);
+
+ANALYZE deck_archetypes;
@@ -0,0 +1,10 @@
+-- Archétypes des decks, regroupés par similarité de leurs cartes (archetypes.py).
+-- archetype_id est le deck_id du deck le plus joué de l'archétype, similarity la similarité estimée du deck avec lui
+DROP TABLE IF EXISTS public.wrk_archetype_stats;
+DROP TABLE IF EXISTS public.deck_archetypes;
+
+CREATE TABLE public.deck_archetypes (
+  deck_id bigint PRIMARY KEY,
+  archetype_id bigint NOT NULL,
+  similarity real NOT NULL
+);
@@ -0,0 +1,8 @@
+-- Exécutions abouties de la transformation. Jamais recréée : run_id ne fait que croître, et le tableau de bord
+-- s'en sert comme numéro de version des données pour invalider son cache
+CREATE TABLE IF NOT EXISTS public.etl_runs (
+  run_id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  finished_at timestamptz NOT NULL DEFAULT now(),
+  incremental boolean NOT NULL,
+  steps varchar
+);
@@ -0,0 +1,69 @@
+-- Recherche de decks du tableau de bord : une ligne par deck avec ce qui s'affiche dans les résultats,
+-- et un index inversé des mots de son nom, de sa carte principale et de ses cartes, interrogé par préfixe
+DROP TABLE IF EXISTS public.deck_search_terms;
+DROP TABLE IF EXISTS public.deck_search;
+
+-- Mots en minuscules, découpés sur les espaces et la ponctuation (les lettres accentuées restent dans leur mot quelle que
+-- soit la locale de la base). Le tableau de bord découpe la recherche avec la même fonction : un mot cherché et un mot
+-- indexé sont toujours normalisés de la même façon, et aucun ne contient de caractère spécial de LIKE
+CREATE OR REPLACE FUNCTION deck_search_words(text) RETURNS SETOF text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+  SELECT DISTINCT word
+  FROM regexp_split_to_table(lower($1), '[[:space:][:punct:]]+') AS word
+  WHERE word <> ''
+$$;
+
+CREATE TABLE public.deck_search (
+  deck_id bigint,
+  deck_name varchar,
+  main_card varchar,
+  deck_version text,
+  games_played bigint,
+  winrate numeric
+);
+
+CREATE TABLE public.deck_search_terms (
+  deck_id bigint,
+  term text
+);
+
+-- Ajoute les decks absents de deck_search et leurs mots ; appelée aussi par le mode incrémental (09_update_deck_search.sql).
+-- Les nombres d'exemplaires de la signature sont retirés, les codes et numéros de cartes (« a1 », « 61 ») restent cherchables
+CREATE OR REPLACE FUNCTION add_new_deck_search() RETURNS void
+LANGUAGE sql
+AS $$
+  WITH new_decks AS (
+    INSERT INTO public.deck_search
+    SELECT
+      d.deck_id,
+      n.deck_name,
+      s.first_pokemon_card_name,
+      s.deck_version,
+      s.games_played,
+      s.winrate
+    FROM dwh_decks d
+    JOIN wrk_deck_stats s ON s.deck_id = d.deck_id
+    LEFT JOIN deck_names n ON n.deck_id = d.deck_id
+    WHERE NOT EXISTS (SELECT 1 FROM public.deck_search x WHERE x.deck_id = d.deck_id)
+    RETURNING deck_id, deck_name, main_card
+  )
+  INSERT INTO public.deck_search_terms (deck_id, term)
+  SELECT n.deck_id, w.term
+  FROM new_decks n
+  JOIN dwh_decks d ON d.deck_id = n.deck_id
+  CROSS JOIN LATERAL deck_search_words(
+    concat_ws(' ', n.deck_name, n.main_card, regexp_replace(d.deck_signature, ':[0-9]+(,|$)', ' ', 'g'))
+  ) AS w(term);
+$$;
+
+SELECT add_new_deck_search();
+
+-- Clé et index créés une fois les tables chargées.
+-- text_pattern_ops : l'index sert aux recherches par préfixe (term LIKE 'char%') quelle que soit la collation
+ALTER TABLE public.deck_search ADD CONSTRAINT pk_deck_search PRIMARY KEY (deck_id);
+CREATE INDEX idx_deck_search_terms_term ON public.deck_search_terms (term text_pattern_ops, deck_id);
+CREATE INDEX idx_deck_search_games_played ON public.deck_search (games_played DESC, deck_id);
+
+ANALYZE public.deck_search;
+ANALYZE public.deck_search_terms;
@@ -0,0 +1,4 @@
+-- Mise à jour incrémentale de la recherche de decks (09_create_deck_search.sql) : seuls les nouveaux decks sont ajoutés
+-- avec leurs mots. Les statistiques des decks rejoués sont reprises par 05_incremental_update.sql, qui connaît ces decks
+-- (le nom, la carte principale et les cartes d'un deck déjà indexé ne changent pas)
+SELECT add_new_deck_search();
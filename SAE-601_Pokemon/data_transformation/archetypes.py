@@ -0,0 +1,73 @@
+import numpy as np
+
+# Nombre premier des fonctions de hachage de MinHash : h(x) = (a * x + b) mod p, avec a, b, x < p < 2^31
+# pour que le produit tienne dans un entier 64 bits
+MINHASH_PRIME = (1 << 31) - 1
+
+def minhash_parameters(nb_permutations, seed=0):
+    """Coefficients (a, b) des fonctions de hachage, fixés par la graine pour que les signatures soient reproductibles."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MINHASH_PRIME, nb_permutations, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, nb_permutations, dtype=np.uint64)
+    return a, b
+
+def minhash_signatures(tokens, offsets, parameters):
+    """Signatures MinHash d'un lot de decks, chacun donné par ses jetons entiers (une carte et un numéro d'exemplaire) :
+    les jetons du deck i sont tokens[offsets[i]:offsets[i + 1]], et aucun deck n'est vide.
+    Retourne une matrice (decks x permutations) où chaque valeur est le minimum d'une fonction de hachage sur les jetons du deck."""
+    a, b = parameters
+    values = (np.asarray(tokens, dtype=np.int64) & MINHASH_PRIME).astype(np.uint64)
+    hashes = (values[:, None] * a[None, :] + b[None, :]) % MINHASH_PRIME
+    return np.minimum.reduceat(hashes, np.asarray(offsets[:-1], dtype=np.int64), axis=0).astype(np.uint32)
+
+def estimated_similarity(signatures, left, right):
+    """Similarité de Jaccard estimée entre les decks left[i] et right[i] : part des valeurs égales de leurs signatures."""
+    return (signatures[left] == signatures[right]).mean(axis=1)
+
+def lsh_bucket_leaders(signatures, rank, nb_bands):
+    """Hachage sensible à la localité : les signatures sont découpées en bandes, et deux decks dont une bande est
+    identique tombent dans le même seau. Retourne pour chaque deck et chaque bande le deck de plus petit rang de son seau,
+    seul candidat retenu par seau : le nombre de comparaisons reste linéaire en le nombre de decks, même pour les grands seaux."""
+    nb_decks, nb_permutations = signatures.shape
+    rows = nb_permutations // nb_bands
+    order = np.argsort(rank)
+    leaders = np.empty((nb_decks, nb_bands), dtype=np.int64)
+    for band in range(nb_bands):
+        band_values = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = band_values.view(np.dtype((np.void, band_values.dtype.itemsize * rows))).ravel()
+        _, bucket = np.unique(keys, return_inverse=True)
+        bucket = bucket.ravel()
+        best_rank = np.full(bucket.max() + 1, nb_decks, dtype=np.int64)
+        np.minimum.at(best_rank, bucket, rank)
+        leaders[:, band] = order[best_rank[bucket]]
+    return leaders
+
+def cluster_decks(signatures, games_played, nb_bands, min_similarity, nb_leaders=0):
+    """Regroupe les decks en archétypes, des plus joués aux moins joués : un deck rejoint l'archétype le plus similaire
+    parmi ceux de ses candidats LSH si sa similarité estimée avec son représentant atteint min_similarity, et fonde
+    sinon un nouvel archétype dont il est le représentant. Chaque deck reste ainsi proche du représentant de son
+    archétype, sans que des decks de proche en proche ne forment un archétype hétérogène.
+    Les nb_leaders premiers decks sont les représentants d'archétypes existants : classés avant tous les autres,
+    ils restent leur propre représentant, et seuls les decks suivants sont affectés.
+    Retourne pour chaque deck l'indice du représentant de son archétype et sa similarité estimée avec lui."""
+    nb_decks = signatures.shape[0]
+    is_new = np.arange(nb_decks) >= nb_leaders
+    order = np.lexsort((np.arange(nb_decks), -np.asarray(games_played, dtype=np.int64), is_new))
+    rank = np.empty(nb_decks, dtype=np.int64)
+    rank[order] = np.arange(nb_decks)
+    leaders = lsh_bucket_leaders(signatures, rank, nb_bands)
+
+    representatives = np.empty(nb_decks, dtype=np.int64)
+    for deck in order.tolist():
+        representatives[deck] = deck
+        if deck < nb_leaders:
+            continue
+        # Les candidats sont classés avant le deck, leur archétype est donc déjà connu
+        candidates = sorted({int(representatives[leader]) for leader in leaders[deck].tolist() if leader != deck})
+        if candidates:
+            similarities = estimated_similarity(signatures, candidates, [deck] * len(candidates))
+            best = int(similarities.argmax())
+            if similarities[best] >= min_similarity:
+                representatives[deck] = candidates[best]
+
+    return representatives, estimated_similarity(signatures, np.arange(nb_decks), representatives)
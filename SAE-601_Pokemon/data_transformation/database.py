@@ -0,0 +1,128 @@
+import logging
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import psycopg
+
+logger = logging.getLogger("data_transformation.database")
+
+# Morceaux d'un script SQL qui peuvent contenir un « ; » sans terminer l'instruction :
+# chaînes, identifiants entre guillemets, commentaires et chaînes dollar ($$...$$, $tag$...$tag$)
+SQL_TOKEN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|(\$[A-Za-z_]*\$).*?\1|;""", re.DOTALL)
+
+def split_sql_statements(script):
+    """Découpe un script SQL en instructions, sans couper les chaînes, commentaires et corps de fonctions."""
+    statements = []
+    start = 0
+    for token in SQL_TOKEN.finditer(script):
+        if token.group() == ";":
+            statements.append(script[start:token.end()])
+            start = token.end()
+    statements.append(script[start:])
+
+    # Les commentaires d'en-tête restent avec leur instruction, les morceaux sans code sont ignorés
+    return [statement.strip() for statement in statements if strip_sql_comments(statement).strip(" \n\t;")]
+
+def strip_sql_comments(sql):
+    """Retire les commentaires d'un morceau de SQL, en laissant intactes les chaînes qui contiennent « -- » ou « /* »."""
+    return SQL_TOKEN.sub(lambda token: "" if token.group().startswith(("--", "/*")) else token.group(), sql)
+
+def statement_label(sql):
+    """Libellé court d'une instruction pour les journaux : sa première ligne de code, tronquée."""
+    for line in sql.splitlines():
+        line = line.strip()
+        if line and not line.startswith("--"):
+            return line if len(line) <= 80 else line[:77] + "..."
+    return sql.strip()[:80]
+
+class StatementTimings:
+    """Durées cumulées des instructions par libellé (nombre d'exécutions, total, maximum), partagées entre threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(lambda: [0, 0.0, 0.0])
+
+    @contextmanager
+    def measure(self, label, nb_statements=1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                timing = self.timings[label]
+                timing[0] += nb_statements
+                timing[1] += duration
+                timing[2] = max(timing[2], duration)
+            logger.debug("%8.1f ms  %s", 1000 * duration, label)
+
+    def report(self, limit=20):
+        """Journalise les instructions les plus coûteuses, par durée totale décroissante."""
+        with self.lock:
+            timings = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)
+        logger.info("%10s %10s %10s  %s", "total ms", "max ms", "count", "statement")
+        for label, (count, total, maximum) in timings[:limit]:
+            logger.info("%10.1f %10.1f %10d  %s", 1000 * total, 1000 * maximum, count, label)
+
+class Database:
+    """Accès partagé à PostgreSQL pour la transformation : pool de connexions ouvertes à la demande et réutilisées
+    (les instructions préparées restent ainsi valables d'une étape à l'autre), pipeline pour les lots de petites
+    instructions, et mesure de la durée de chaque instruction."""
+
+    def __init__(self, conninfo, max_connections=4):
+        self.conninfo = conninfo
+        self.timings = StatementTimings()
+        self.all_connections = []
+        # Un jeton par connexion possible : None tant que la connexion n'a pas été ouverte
+        self.idle = queue.LifoQueue()
+        for _ in range(max_connections):
+            self.idle.put(None)
+
+    @contextmanager
+    def connection(self):
+        """Emprunte une connexion du pool, dans une transaction validée en sortie (annulée en cas d'erreur)."""
+        conn = self.idle.get()
+        try:
+            if conn is None or conn.closed or conn.broken:
+                conn = psycopg.connect(self.conninfo)
+                self.all_connections.append(conn)
+            with conn.transaction():
+                yield conn
+        finally:
+            self.idle.put(conn if conn is not None and not conn.closed and not conn.broken else None)
+
+    def execute(self, sql, params=None, label=None):
+        """Exécute une instruction (préparée si elle a des paramètres) et retourne ses lignes s'il y en a."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                with self.timings.measure(label or statement_label(sql)):
+                    cur.execute(sql, params, prepare=params is not None)
+                return cur.fetchall() if cur.description is not None else None
+
+    def execute_batch(self, sql, params_seq, label=None):
+        """Exécute une même instruction préparée pour chaque jeu de paramètres, en mode pipeline :
+        les instructions partent sans attendre la réponse de la précédente."""
+        params_seq = list(params_seq)
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                with self.timings.measure(label or statement_label(sql), len(params_seq)):
+                    with conn.pipeline():
+                        for params in params_seq:
+                            cur.execute(sql, params, prepare=True)
+
+    def execute_script(self, script, script_name):
+        """Exécute les instructions d'un script SQL une à une dans une même transaction, chacune chronométrée."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                for statement in split_sql_statements(script):
+                    with self.timings.measure(f"{script_name}: {statement_label(statement)}"):
+                        cur.execute(statement)
+
+    def close(self):
+        for conn in self.all_connections:
+            conn.close()
+        self.all_connections.clear()
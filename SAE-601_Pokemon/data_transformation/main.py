@@ -1,8 +1,27 @@
-import psycopg
+import argparse
+import logging
+import glob
 import os
 import json
+import multiprocessing
 import re
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+from archetypes import cluster_decks, minhash_parameters, minhash_signatures
+from database import Database
+from pipeline import Pipeline
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:
+    ds = None  # Sortie Parquet de la collecte illisible sans pyarrow
 
 # Paramètres de connexion PostgreSQL
 DB_NAME = "PokemonDB"
@@ -11,10 +30,50 @@ DB_PASSWORD = "1234"
 DB_HOST = "127.0.0.1"
 DB_PORT = "5432"
 
+# Étapes de la transformation exécutées en même temps, et connexions ouvertes au plus en même temps
+# (les trois COPY du chargement, la lecture et l'écriture du nommage des decks, et les étapes parallèles)
+PIPELINE_WORKERS = 4
+DB_MAX_CONNECTIONS = 8
+
+# Colonnes des tables de travail chargées depuis la collecte, avec leur type PostgreSQL pour le COPY binaire
+WRK_TABLE_COLUMNS = {
+    "wrk_tournaments": {
+        "tournament_id": "varchar", "tournament_name": "varchar", "tournament_date": "timestamp",
+        "tournament_organizer": "varchar", "tournament_format": "varchar", "tournament_nb_players": "int4",
+    },
+    "wrk_decklists": {
+        "tournament_id": "varchar", "player_id": "varchar", "card_type": "varchar", "card_name": "varchar",
+        "card_url": "varchar", "card_count": "int4",
+    },
+    "wrk_matches": {
+        "tournament_id": "varchar", "match_id": "int4", "player_id": "varchar", "score": "int4",
+    },
+}
+
+# Lecture parallèle de la collecte : processus de lecture, tâches lues d'avance, tournois NDJSON par tâche,
+# et lots de lignes en attente dans la file de chaque COPY
+INGEST_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+INGEST_WINDOW = 4 * INGEST_WORKERS
+NDJSON_CHUNK_LINES = 16
+COPY_QUEUE_SIZE = 256
+
+# Decks lus par aller-retour lors du nommage des decks
+DECK_FETCH_SIZE = 5000
+
+# Regroupement des decks en archétypes : permutations de MinHash, bandes du LSH (4 valeurs par bande : des decks
+# similaires à 70 % partagent un seau dans 99 % des cas), et similarité de Jaccard estimée minimale avec le
+# représentant d'un archétype pour le rejoindre (un exemplaire échangé dans un deck de 20 cartes : 0,9)
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+ARCHETYPE_SIMILARITY = 0.7
+
 def get_connection_string():
     """Retourne la chaîne de connexion à la base de données PostgreSQL."""
     return f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Accès partagé à la base pour toute la transformation
+db = Database(get_connection_string(), DB_MAX_CONNECTIONS)
+
 def get_absolute_path(relative_path):
     """Convertit un chemin relatif en chemin absolu basé sur le répertoire courant du script."""
     return os.path.abspath(os.path.join(os.path.dirname(__file__), relative_path))
@@ -22,10 +81,8 @@ def get_absolute_path(relative_path):
 def execute_sql_script(relative_path):
     """Exécute un script SQL à partir d'un fichier."""
     full_path = get_absolute_path(relative_path)
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            with open(full_path, encoding="utf-8") as f:
-                cur.execute(f.read())
+    with open(full_path, encoding="utf-8") as f:
+        db.execute_script(f.read(), relative_path)
 
 def normalize_player_id(player_id):
     """Normalise l'identifiant du joueur."""
@@ -36,18 +93,6 @@ def load_json_data(file_path):
     with open(file_path, encoding="utf-8") as f:
         return json.load(f)
 
-def insert_data_from_json(directory, sql_query, data_extractor):
-    """Insère des données dans la base de données à partir de fichiers JSON."""
-    data = []
-    for file in os.listdir(directory):
-        file_path = os.path.join(directory, file)
-        tournament = load_json_data(file_path)
-        data.extend(data_extractor(tournament))
-
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            cur.executemany(sql_query, data)
-
 def extract_tournament_data(tournament):
     """Extrait les données de tournoi."""
     return [(tournament['id'], tournament['name'], datetime.strptime(tournament['date'], '%Y-%m-%dT%H:%M:%S.000Z'),
@@ -59,7 +104,6 @@ def extract_decklist_data(tournament):
     decklist_data = []
     for player in tournament['players']:
         player_id = normalize_player_id(player['id'])
-        deck_signature = f"{tournament_id}_{player_id}"
         for card in player['decklist']:
             decklist_data.append((
                 tournament_id,
@@ -67,8 +111,7 @@ def extract_decklist_data(tournament):
                 card['type'],
                 card['name'],
                 card['url'],
-                int(card['count']),
-                deck_signature
+                int(card['count'])
             ))
     return decklist_data
 
@@ -83,6 +126,197 @@ def extract_match_data(tournament):
             match_data.append((tournament_id, idx, player_id, score))
     return match_data
 
+def extract_tournament_data_from_parquet(rows):
+    """Extrait les données de tournoi des lignes de la table Parquet des tournois."""
+    for row in rows:
+        yield (row['id'], row['name'], datetime.strptime(row['date'], '%Y-%m-%dT%H:%M:%S.000Z'),
+               row['organizer'], row['format'], row['nb_players'])
+
+def extract_decklist_data_from_parquet(rows):
+    """Extrait les données de liste de decks des lignes de la table Parquet des decklists."""
+    for row in rows:
+        yield (
+            row['tournament_id'],
+            normalize_player_id(row['player_id']),
+            row['card_type'],
+            row['card_name'],
+            row['card_url'],
+            row['card_count']
+        )
+
+def extract_match_data_from_parquet(rows):
+    """Extrait les données de matchs des lignes de la table Parquet des matchs."""
+    for row in rows:
+        yield (row['tournament_id'], row['match_index'], normalize_player_id(row['player_id']), row['score'])
+
+# Tables de travail alimentées par chaque table du dataset Parquet de la collecte
+PARQUET_SOURCES = [
+    ("wrk_tournaments", "tournaments", extract_tournament_data_from_parquet),
+    ("wrk_decklists", "decklists", extract_decklist_data_from_parquet),
+    ("wrk_matches", "matches", extract_match_data_from_parquet),
+]
+
+def extract_tournament_rows(tournament):
+    """Extrait en une fois les lignes des trois tables de travail d'un tournoi."""
+    return tournament['id'], (extract_tournament_data(tournament), extract_decklist_data(tournament), extract_match_data(tournament))
+
+def extract_json_file_rows(file_path):
+    """Lit un fichier JSON de la collecte et retourne les lignes de son tournoi (exécuté dans le pool de processus)."""
+    return [extract_tournament_rows(load_json_data(file_path))]
+
+def extract_ndjson_rows(lines):
+    """Lit un lot de lignes du fichier NDJSON de la collecte et retourne les lignes de chaque tournoi (exécuté dans le pool de processus)."""
+    return [extract_tournament_rows(json.loads(line)) for line in lines if line.strip()]
+
+# Identifiant d'un tournoi NDJSON, premier champ de sa ligne : il suffit pour écarter un tournoi déjà intégré sans décoder la ligne
+NDJSON_ID = re.compile(r'\{"id":("(?:[^"\\]|\\.)*")')
+
+def ndjson_tournament_id(line):
+    """Retourne l'identifiant du tournoi d'une ligne NDJSON (None s'il n'est pas en tête de ligne)."""
+    match = NDJSON_ID.match(line)
+    return json.loads(match.group(1)) if match is not None else None
+
+def iter_ingest_tasks(directory, known_ids=frozenset()):
+    """Découpe la sortie JSON/NDJSON de la collecte en tâches de lecture : un fichier JSON, ou un lot de lignes du fichier NDJSON.
+    Les tournois de known_ids (déjà intégrés) sont écartés avant lecture."""
+    for file in sorted(os.listdir(directory)):
+        file_path = os.path.join(directory, file)
+        if file.endswith(".json"):
+            if file.removesuffix(".json") not in known_ids:
+                yield extract_json_file_rows, file_path
+        elif file.endswith(".ndjson"):
+            with open(file_path, encoding="utf-8") as f:
+                new_lines = (line for line in f if ndjson_tournament_id(line) not in known_ids)
+                while lines := list(islice(new_lines, NDJSON_CHUNK_LINES)):
+                    yield extract_ndjson_rows, lines
+
+def parquet_files(directory, table):
+    """Fichiers d'une table du dataset Parquet où chaque tournoi n'apparaît qu'une fois. ParquetOutput.close() fusionne
+    les fichiers des tournois en lots (batch-*), renommés table par table, celui des tournois en dernier, puis supprime
+    les fichiers des tournois : un lot ne compte que si le lot des tournois du même nom existe, et le fichier d'un
+    tournoi que si ce tournoi n'est dans aucun de ces lots."""
+    tournaments_dir = os.path.join(directory, "parquet", "tournaments")
+    batch_names = {os.path.basename(path) for path in glob.glob(os.path.join(tournaments_dir, "batch-*.parquet"))}
+    batch_ids = set()
+    for name in batch_names:
+        batch_ids.update(ds.dataset(os.path.join(tournaments_dir, name), format="parquet").to_table(columns=["id"]).column("id").to_pylist())
+
+    files = []
+    for path in sorted(glob.glob(os.path.join(directory, "parquet", table, "*.parquet"))):
+        name = os.path.basename(path)
+        if name.startswith("batch-"):
+            if name in batch_names:
+                files.append(path)
+        elif name.removesuffix(".parquet") not in batch_ids:
+            files.append(path)
+    return files
+
+def iter_parquet_batches(directory, table, columns=None, known_ids=frozenset()):
+    """Parcourt une table du dataset Parquet de la collecte par lots de lignes (rien si la collecte n'a pas produit de Parquet),
+    sans les lignes des tournois de known_ids."""
+    if not glob.glob(os.path.join(directory, "parquet", table, "*.parquet")):
+        return
+    if ds is None:
+        raise RuntimeError("La sortie Parquet de la collecte nécessite pyarrow (pip install pyarrow)")
+    files = parquet_files(directory, table)
+    if not files:
+        return
+    row_filter = None
+    if known_ids:
+        row_filter = ~ds.field("id" if table == "tournaments" else "tournament_id").isin(list(known_ids))
+    for batch in ds.dataset(files, format="parquet").to_batches(columns=columns, filter=row_filter):
+        yield batch.to_pylist()
+
+class CopyStream(threading.Thread):
+    """Charge une table de travail avec COPY ... FROM STDIN (format binaire) sur sa propre connexion,
+    à partir des lots de lignes reçus dans une file bornée."""
+
+    def __init__(self, table, target_table=None):
+        super().__init__(name=f"copy-{table}")
+        self.table = table
+        self.target_table = target_table or table
+        self.rows_queue = queue.Queue(maxsize=COPY_QUEUE_SIZE)
+        self.aborted = False
+        self.error = None
+
+    def run(self):
+        columns = WRK_TABLE_COLUMNS[self.table]
+        received_end = False
+        try:
+            with db.connection() as conn, db.timings.measure(f"COPY {self.target_table}"):
+                with conn.cursor() as cur:
+                    with cur.copy(f"COPY public.{self.target_table} ({', '.join(columns)}) FROM STDIN (FORMAT BINARY)") as copy:
+                        copy.set_types(list(columns.values()))
+                        while (rows := self.rows_queue.get()) is not None:
+                            for row in rows:
+                                copy.write_row(row)
+                        received_end = True
+                        if self.aborted:
+                            raise RuntimeError(f"Chargement de {self.target_table} interrompu")
+        except Exception as e:
+            self.error = e
+            # Vider la file jusqu'à la fin pour ne jamais bloquer la lecture de la collecte
+            while not received_end:
+                received_end = self.rows_queue.get() is None
+
+    def put(self, rows):
+        self.rows_queue.put(rows)
+
+    def finish(self, abort=False):
+        """Termine le COPY (annulé et rollbacké si abort) et attend la fin du chargement."""
+        self.aborted = abort
+        self.rows_queue.put(None)
+        self.join()
+
+def ingest_collection_output(directory, staging=False, known_ids=frozenset()):
+    """Charge les trois tables de travail (ou leurs tables de transit stg_* si staging) en une seule lecture
+    de la sortie de la collecte, sans les tournois de known_ids.
+    Les fichiers JSON et les lots NDJSON sont lus en parallèle par un pool de processus,
+    et leurs lignes réparties entre trois COPY concurrents (un par table)."""
+    streams = {table: CopyStream(table, table.replace("wrk_", "stg_", 1) if staging else None) for table in WRK_TABLE_COLUMNS}
+    for stream in streams.values():
+        stream.start()
+
+    def dispatch(tournaments_rows):
+        for stream in streams.values():
+            if stream.error is not None:
+                raise stream.error
+        for tournament_id, rows_by_table in tournaments_rows:
+            if tournament_id in seen_ids:
+                continue
+            seen_ids.add(tournament_id)
+            for stream, rows in zip(streams.values(), rows_by_table):
+                stream.put(rows)
+
+    try:
+        for table, parquet_table, parquet_extractor in PARQUET_SOURCES:
+            for rows in iter_parquet_batches(directory, parquet_table, known_ids=known_ids):
+                streams[table].put(list(parquet_extractor(rows)))
+        seen_ids = set(known_ids)
+        seen_ids.update(row['id'] for rows in iter_parquet_batches(directory, "tournaments", ["id"]) for row in rows)
+
+        # Processus lancés par spawn : la lecture tourne en même temps que d'autres étapes (threads), un fork
+        # pourrait copier un verrou tenu par l'un d'eux.
+        # Au plus INGEST_WINDOW tâches lues d'avance, pour borner la mémoire quand les COPY sont plus lents que la lecture
+        with ProcessPoolExecutor(INGEST_WORKERS, mp_context=multiprocessing.get_context("spawn")) as executor:
+            pending = deque()
+            for task in iter_ingest_tasks(directory, known_ids):
+                pending.append(executor.submit(*task))
+                if len(pending) >= INGEST_WINDOW:
+                    dispatch(pending.popleft().result())
+            while pending:
+                dispatch(pending.popleft().result())
+    except BaseException:
+        for stream in streams.values():
+            stream.finish(abort=True)
+        raise
+
+    for stream in streams.values():
+        stream.finish()
+    for stream in streams.values():
+        if stream.error is not None:
+            raise stream.error
+
 def build_evolution_hierarchy(cards_data):
     """Construire une hiérarchie d'évolution à partir des données des cartes."""
     evolution_hierarchy = {}
@@ -111,32 +345,6 @@ def get_final_evolution_pokemons(detailed_cards_data):
 
     return final_evolution_pokemons
 
-def calculate_winrate():
-    """Calcule le winrate et met à jour la table des statistiques de deck."""
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM wrk_deck_stats")
-
-            cur.execute("""
-                SELECT
-                    m.tournament_id || '_' || m.player_id AS deck_signature,
-                    COUNT(*) AS games_played,
-                    SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) AS wins,
-                    SUM(CASE WHEN m.score = 0 THEN 1 ELSE 0 END) AS losses,
-                    ROUND(SUM(CASE WHEN m.score = 2 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS winrate
-                FROM
-                    wrk_matches m
-                GROUP BY
-                    deck_signature
-            """)
-            winrate_data = cur.fetchall()
-
-            for row in winrate_data:
-                cur.execute("""
-                    INSERT INTO wrk_deck_stats (deck_signature, games_played, wins, losses, winrate)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, row)
-
 def insert_detailed_cards():
     """Insère des données détaillées sur les cartes dans la base de données."""
     pokemon_cards_path = get_absolute_path("../data_collection/pokemon_cards.json")
@@ -145,56 +353,26 @@ def insert_detailed_cards():
 
     final_evolution_pokemons = get_final_evolution_pokemons(detailed_cards_data)
 
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            for card in detailed_cards_data:
-                pokemon_name = card["name"].split(" (")[0]
-                is_final_evolution = pokemon_name in final_evolution_pokemons
-
-                cur.execute("""
-                    INSERT INTO public.detailed_cards
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    card["name"],
-                    card["element_type"],
-                    card["evolution_stage"],
-                    card["hp"],
-                    card["rarity"],
-                    card["url"],
-                    card["image_url"],
-                    is_final_evolution
-                ))
-
-def get_all_deck_signatures():
-    """Récupère tous les deck_signature uniques de la base de données."""
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT deck_signature
-                FROM wrk_decklists
-            """)
-            deck_signatures = [row[0] for row in cur.fetchall()]
-
-    return deck_signatures
-
-def get_cards_in_deck(deck_signature):
-    """Récupère les cartes d'un deck donné."""
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT card_name, card_count
-                FROM wrk_decklists
-                WHERE deck_signature = %s
-            """, (deck_signature,))
-
-            cards = cur.fetchall()
-
-    return cards
-
-def format_deck_cards(cards):
-    """Formate les cartes du deck selon le format souhaité."""
-    formatted_cards = [f"{card[0]}:{card[1]}" for card in cards]
-    return ",".join(formatted_cards)
+    rows = []
+    for card in detailed_cards_data:
+        pokemon_name = card["name"].split(" (")[0]
+        is_final_evolution = pokemon_name in final_evolution_pokemons
+
+        rows.append((
+            card["name"],
+            card["element_type"],
+            card["evolution_stage"],
+            card["hp"],
+            card["rarity"],
+            card["url"],
+            card["image_url"],
+            is_final_evolution
+        ))
+
+    db.execute_batch("""
+        INSERT INTO public.detailed_cards
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, rows, label="INSERT INTO public.detailed_cards")
 
 def clean_pokemon_name(pokemon_name):
     """Nettoie le nom du Pokémon en supprimant les parenthèses et les suffixes comme 'ex'."""
@@ -202,89 +380,260 @@ def clean_pokemon_name(pokemon_name):
     cleaned_name = re.sub(r'\s*ex\s*$', '', cleaned_name, flags=re.IGNORECASE).strip()
     return cleaned_name
 
-def get_final_evolution_pokemons_in_deck(deck_signature):
-    """Récupère les noms des Pokémon à leur dernier stade d'évolution dans un deck donné."""
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT d.card_name
-                FROM wrk_decklists w
-                JOIN detailed_cards d ON w.card_name = d.card_name
-                WHERE w.deck_signature = %s AND d.is_final_evolution = TRUE
-            """, (deck_signature,))
-
-            final_evolution_pokemons = [row[0] for row in cur.fetchall()]
-
-    return final_evolution_pokemons
-
-def generate_deck_name(deck_signature):
+def generate_deck_name(final_evolution_pokemons):
     """Génère le nom du deck basé sur les Pokémon à leur dernier stade d'évolution."""
-    final_evolution_pokemons = get_final_evolution_pokemons_in_deck(deck_signature)
     cleaned_pokemon_names = [clean_pokemon_name(name) for name in final_evolution_pokemons]
     deck_name = " - ".join(cleaned_pokemon_names)
     return deck_name
 
-def store_deck_info(deck_signature, formatted_cards, deck_name):
-    """Stocke les informations du deck dans la base de données."""
-    with psycopg.connect(get_connection_string()) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO public.deck_names (deck_signature, formatted_cards, deck_name)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (deck_signature) DO UPDATE
-                SET formatted_cards = EXCLUDED.formatted_cards, deck_name = EXCLUDED.deck_name
-            """, (deck_signature, formatted_cards, deck_name))
-
-def main():
-    print("Creating work tables...")
-    execute_sql_script("00_create_wrk_tables.sql")
-
-    output_directory = get_absolute_path("../data_collection/output")
-
-    print("Inserting tournament data...")
-    insert_data_from_json(output_directory, """
-        INSERT INTO public.wrk_tournaments VALUES (%s, %s, %s, %s, %s, %s)
-    """, extract_tournament_data)
-
-    print("Inserting decklist data...")
-    insert_data_from_json(output_directory, """
-        INSERT INTO public.wrk_decklists (tournament_id, player_id, card_type, card_name, card_url, card_count, deck_signature)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """, extract_decklist_data)
-
-    print("Inserting match data...")
-    insert_data_from_json(output_directory, """
-        INSERT INTO public.wrk_matches VALUES (%s, %s, %s, %s)
-    """, extract_match_data)
-
-    print("Building card dimension...")
-    execute_sql_script("01_dwh_cards.sql")
-
-    print("Building deck statistics...")
-    execute_sql_script("02_analysis_deck_stats.sql")
-
-    print("Creating detailed cards table...")
+# Decks à nommer : ceux des tournois pas encore nommés qui n'ont pas encore de nom
+NEW_DECKS_FILTER = """
+    p.tournament_id IN (SELECT tournament_id FROM etl_ingested_tournaments WHERE NOT decks_named)
+    AND NOT EXISTS (SELECT 1 FROM deck_names n WHERE n.deck_id = p.deck_id)
+"""
+
+def iter_decks(conn, all_decks=False):
+    """Parcourt en une seule requête lue par curseur serveur les decks (deck_id) à nommer (tous si all_decks),
+    avec leurs Pokémon à leur dernier stade d'évolution (distincts, triés par nom).
+    Les cartes d'un deck_id étant les mêmes pour tous ses joueurs, un seul joueur par deck est lu."""
+    with conn.cursor(name="decks") as cur:
+        cur.itersize = DECK_FETCH_SIZE
+        cur.execute(f"""
+            WITH new_decks AS (
+                SELECT DISTINCT ON (p.deck_id) p.deck_id, p.tournament_id, p.player_id
+                FROM wrk_player_decks p
+                WHERE {"TRUE" if all_decks else NEW_DECKS_FILTER}
+                ORDER BY p.deck_id, p.tournament_id, p.player_id
+            )
+            SELECT n.deck_id,
+                   COALESCE(array_agg(DISTINCT d.card_name ORDER BY d.card_name) FILTER (WHERE d.card_name IS NOT NULL), '{{}}')
+            FROM new_decks n
+            JOIN wrk_decklists w ON w.tournament_id = n.tournament_id AND w.player_id = n.player_id
+            LEFT JOIN detailed_cards d ON d.card_name = w.card_name AND d.is_final_evolution = TRUE
+            GROUP BY n.deck_id
+        """)
+        yield from cur
+
+def store_deck_names(all_decks=False):
+    """Ajoute à deck_names les decks des tournois pas encore nommés (tous les decks si all_decks) en une passe, écrite avec COPY.
+    Ces tournois sont marqués nommés dans la même transaction, une reprise après erreur nomme donc les mêmes decks."""
+    with db.connection() as read_conn, db.connection() as write_conn, db.timings.measure("deck naming (decks query + COPY deck_names)"):
+        with write_conn.cursor() as cur:
+            with cur.copy("COPY public.deck_names (deck_id, deck_name) FROM STDIN") as copy:
+                for deck_id, final_evolution_pokemons in iter_decks(read_conn, all_decks):
+                    copy.write_row((deck_id, generate_deck_name(final_evolution_pokemons)))
+            cur.execute("UPDATE etl_ingested_tournaments SET decks_named = TRUE WHERE NOT decks_named")
+
+# Decks lus pour les archétypes du mode incrémental : représentants des archétypes existants, et decks encore sans archétype
+ARCHETYPE_LEADERS_FILTER = "p.deck_id IN (SELECT archetype_id FROM deck_archetypes)"
+UNASSIGNED_DECKS_FILTER = "NOT EXISTS (SELECT 1 FROM deck_archetypes a WHERE a.deck_id = p.deck_id)"
+
+def iter_deck_tokens(conn, deck_filter="TRUE"):
+    """Parcourt par curseur serveur les decks (deck_id) retenus par deck_filter, leur nombre de parties et leurs cartes en jetons entiers :
+    un jeton par exemplaire de carte (hachage du nom et du numéro d'exemplaire), pour comparer les decks comme multiensembles.
+    Les decks sont triés par deck_id pour que les archétypes ne dépendent pas de l'ordre de lecture."""
+    with conn.cursor(name="deck_tokens") as cur:
+        cur.itersize = DECK_FETCH_SIZE
+        cur.execute(f"""
+            WITH decks AS (
+                SELECT DISTINCT ON (p.deck_id) p.deck_id, p.tournament_id, p.player_id
+                FROM wrk_player_decks p
+                WHERE {deck_filter}
+                ORDER BY p.deck_id, p.tournament_id, p.player_id
+            )
+            SELECT d.deck_id,
+                   COALESCE(MIN(w.games_played), 0),
+                   COALESCE(array_agg(hashtext(l.card_name || '#' || copy.n)) FILTER (WHERE copy.n IS NOT NULL), '{{0}}')
+            FROM decks d
+            JOIN wrk_decklists l ON l.tournament_id = d.tournament_id AND l.player_id = d.player_id
+            LEFT JOIN LATERAL generate_series(1, l.card_count) AS copy(n) ON TRUE
+            LEFT JOIN wrk_deck_winrates w ON w.deck_id = d.deck_id
+            GROUP BY d.deck_id
+            ORDER BY d.deck_id
+        """)
+        yield from cur
+
+def read_deck_signatures(conn, parameters, deck_filter="TRUE"):
+    """Lit les decks retenus par deck_filter et calcule leurs signatures MinHash par lots de DECK_FETCH_SIZE decks au fil de la lecture.
+    Retourne leurs deck_id, leurs nombres de parties et la matrice de leurs signatures."""
+    deck_ids, games_played, signatures = [], [], [np.empty((0, MINHASH_PERMUTATIONS), dtype=np.uint32)]
+    decks = iter_deck_tokens(conn, deck_filter)
+    while batch := list(islice(decks, DECK_FETCH_SIZE)):
+        offsets = np.cumsum([0] + [len(tokens) for _, _, tokens in batch])
+        tokens = np.fromiter((token for _, _, deck_tokens in batch for token in deck_tokens), dtype=np.int64, count=offsets[-1])
+        signatures.append(minhash_signatures(tokens, offsets, parameters))
+        deck_ids.extend(deck_id for deck_id, _, _ in batch)
+        games_played.extend(games for _, games, _ in batch)
+    return deck_ids, games_played, np.concatenate(signatures)
+
+def write_deck_archetypes(deck_ids, representatives, similarities, first=0):
+    """Écrit avec COPY dans deck_archetypes l'archétype des decks à partir de l'indice first (les précédents y sont déjà)."""
+    with db.connection() as write_conn, db.timings.measure("COPY deck_archetypes"):
+        with write_conn.cursor() as cur:
+            with cur.copy("COPY public.deck_archetypes (deck_id, archetype_id, similarity) FROM STDIN") as copy:
+                for deck_id, representative, similarity in islice(zip(deck_ids, representatives.tolist(), similarities.tolist()), first, None):
+                    copy.write_row((deck_id, deck_ids[representative], similarity))
+
+def store_deck_archetypes():
+    """Regroupe tous les decks en archétypes (MinHash et LSH, voir archetypes.py) et écrit deck_archetypes avec COPY."""
+    parameters = minhash_parameters(MINHASH_PERMUTATIONS)
+    with db.connection() as read_conn, db.timings.measure("deck archetypes (deck tokens query + MinHash)"):
+        deck_ids, games_played, signatures = read_deck_signatures(read_conn, parameters)
+    if not deck_ids:
+        return
+
+    with db.timings.measure("deck archetypes (LSH clustering)"):
+        representatives, similarities = cluster_decks(signatures, games_played, LSH_BANDS, ARCHETYPE_SIMILARITY)
+    write_deck_archetypes(deck_ids, representatives, similarities)
+
+def assign_deck_archetypes():
+    """Affecte un archétype aux seuls decks qui n'en ont pas encore (mode incrémental) : chacun rejoint l'archétype existant
+    ou nouveau le plus similaire, ou en fonde un. Les archétypes existants et leurs représentants ne changent pas, seules
+    les signatures des représentants et des nouveaux decks sont calculées."""
+    parameters = minhash_parameters(MINHASH_PERMUTATIONS)
+    with db.connection() as read_conn, db.timings.measure("deck archetypes (deck tokens query + MinHash)"):
+        leader_ids, leader_games, leader_signatures = read_deck_signatures(read_conn, parameters, ARCHETYPE_LEADERS_FILTER)
+        deck_ids, games_played, signatures = read_deck_signatures(read_conn, parameters, UNASSIGNED_DECKS_FILTER)
+    if not deck_ids:
+        return
+
+    with db.timings.measure("deck archetypes (LSH assignment)"):
+        representatives, similarities = cluster_decks(
+            np.concatenate([leader_signatures, signatures]), leader_games + games_played, LSH_BANDS, ARCHETYPE_SIMILARITY, len(leader_ids)
+        )
+    write_deck_archetypes(leader_ids + deck_ids, representatives, similarities, len(leader_ids))
+
+def get_ingested_tournament_ids():
+    """Retourne les identifiants des tournois déjà intégrés, ou None si aucune transformation complète n'a abouti."""
+    if db.execute("SELECT to_regclass('public.etl_ingested_tournaments')")[0][0] is None:
+        return None
+    return frozenset(row[0] for row in db.execute("SELECT tournament_id FROM etl_ingested_tournaments"))
+
+def sql_step(*relative_paths):
+    """Étape exécutant un ou plusieurs scripts SQL."""
+    def run():
+        for relative_path in relative_paths:
+            execute_sql_script(relative_path)
+    return run
+
+def load_detailed_cards():
+    """Recrée la table detailed_cards et y charge le catalogue de cartes."""
     execute_sql_script("03_create_detailed_cards_table.sql")
-
-    print("Creating deck names table...")
-    execute_sql_script("04_create_deck_names_table.sql")
-
-    print("Inserting detailed cards data...")
     insert_detailed_cards()
 
-    
-
-    # Récupérer tous les deck_signature et traiter chaque deck
-    deck_signatures = get_all_deck_signatures()
-    for deck_signature in deck_signatures:
-        cards = get_cards_in_deck(deck_signature)
-        formatted_cards = format_deck_cards(cards)
-        deck_name = generate_deck_name(deck_signature)
+def rebuild_deck_names():
+    """Recrée la table deck_names et nomme tous les decks, y compris ceux de tournois déjà marqués nommés (--step deck_names)."""
+    execute_sql_script("04_create_deck_names_table.sql")
+    store_deck_names(all_decks=True)
+
+def rebuild_deck_archetypes():
+    """Recrée deck_archetypes en regroupant tous les decks, puis les statistiques par archétype."""
+    execute_sql_script("07_create_deck_archetypes_table.sql")
+    store_deck_archetypes()
+    execute_sql_script("07_analysis_archetype_stats.sql")
+
+def update_deck_archetypes():
+    """Affecte un archétype aux nouveaux decks, puis recalcule les statistiques par archétype."""
+    assign_deck_archetypes()
+    execute_sql_script("07_analysis_archetype_stats.sql")
+
+def load_wrk_tables(output_directory):
+    """Vide les tables de travail puis y charge toute la sortie de la collecte."""
+    execute_sql_script("00_reset_wrk_tables.sql")
+    ingest_collection_output(output_directory)
+
+def publish_run(incremental, steps):
+    """Enregistre l'exécution dans etl_runs une fois toutes les tables à jour : le tableau de bord relit alors ses données."""
+    execute_sql_script("08_create_etl_runs_table.sql")
+    run_id = db.execute(
+        "INSERT INTO public.etl_runs (incremental, steps) VALUES (%s, %s) RETURNING run_id",
+        (incremental, ",".join(steps) if steps else None)
+    )[0][0]
+    print(f"Published data version {run_id}")
+
+def build_full_pipeline(output_directory, steps=None):
+    """Étapes de la transformation complète, qui reconstruit toutes les tables à partir de l'ensemble de la collecte."""
+    pipeline = Pipeline(PIPELINE_WORKERS)
+    pipeline.add("wrk_tables", sql_step("00_create_wrk_tables.sql"), description="Creating work tables...")
+    pipeline.add("ingest", lambda: load_wrk_tables(output_directory), ["wrk_tables"], "Inserting tournament, decklist and match data...")
+    pipeline.add("wrk_indexes", sql_step("00_create_wrk_indexes.sql"), ["ingest"], "Indexing work tables...")
+    pipeline.add("dwh_cards", sql_step("01_dwh_cards.sql"), ["wrk_indexes"], "Building card dimension...")
+    pipeline.add("deck_signatures", sql_step("02_analysis_deck_signatures.sql"), ["wrk_indexes"], "Building deck signatures...")
+    pipeline.add("deck_winrates", sql_step("02_analysis_deck_winrates.sql"), ["deck_signatures"], "Building deck winrates...")
+    pipeline.add("deck_versions", sql_step("02_analysis_deck_versions.sql"), ["deck_signatures"], "Building deck versions...")
+    pipeline.add("deck_first_pokemon", sql_step("02_analysis_deck_first_pokemon.sql"), ["deck_signatures"], "Building deck first Pokémon...")
+    pipeline.add("deck_stats", sql_step("02_analysis_deck_stats.sql"), ["deck_winrates", "deck_versions", "deck_first_pokemon"], "Building deck statistics...")
+    pipeline.add("deck_matchups", sql_step("02_analysis_deck_matchups.sql"), ["deck_winrates", "deck_first_pokemon"], "Building matchup matrix...")
+    pipeline.add("deck_archetypes", rebuild_deck_archetypes, ["deck_winrates", "deck_first_pokemon"], "Clustering decks into archetypes...")
+    pipeline.add("metagame_cube", sql_step("02_analysis_metagame_cube.sql"), ["deck_winrates", "deck_versions", "deck_first_pokemon"], "Building metagame cube...")
+    # Le catalogue de cartes ne dépend pas de la collecte des tournois
+    pipeline.add("detailed_cards", load_detailed_cards, description="Creating and inserting detailed cards data...")
+    pipeline.add("star_schema", sql_step("05_create_star_schema.sql"), ["dwh_cards", "deck_signatures", "detailed_cards"], "Building star schema warehouse...")
+    # Enregistrés en dernier : la table des tournois intégrés signale au mode incrémental une base complète
+    pipeline.add("ingested_tournaments", sql_step("06_create_ingested_tournaments_table.sql"), ["deck_stats", "deck_matchups", "deck_archetypes", "metagame_cube", "star_schema"], "Recording ingested tournaments...")
+    pipeline.add("deck_names", rebuild_deck_names, ["ingested_tournaments", "detailed_cards"], "Naming decks...")
+    pipeline.add("deck_search", sql_step("09_create_deck_search.sql"), ["deck_names"], "Indexing deck search...")
+    pipeline.add("publish_run", lambda: publish_run(False, steps), ["deck_search"], "Publishing data version...")
+    return pipeline
+
+def build_incremental_pipeline(output_directory, known_ids, steps=None, recluster=False):
+    """Étapes du mode incrémental, qui intègre les seuls tournois absents de la base et met à jour les agrégats des decks qu'ils concernent.
+    Les nouveaux decks sont affectés aux archétypes existants, ou tous les decks regroupés à nouveau si recluster."""
+    pipeline = Pipeline(PIPELINE_WORKERS)
+    # Table de référence des cartes, reconstruite à chaque exécution (sa taille ne dépend pas de l'historique des tournois) ;
+    # la mise à jour en tire les attributs de la dimension des cartes
+    pipeline.add("detailed_cards", load_detailed_cards, description="Creating and inserting detailed cards data...")
+    pipeline.add("stg_tables", sql_step("00_create_stg_tables.sql"), description="Creating staging tables...")
+    pipeline.add(
+        "ingest", lambda: ingest_collection_output(output_directory, staging=True, known_ids=known_ids), ["stg_tables"],
+        f"Inserting new tournaments ({len(known_ids)} already ingested)..."
+    )
+    pipeline.add("incremental_update", sql_step("05_incremental_update.sql"), ["ingest", "detailed_cards"], "Updating work tables, deck statistics and warehouse...")
+    pipeline.add("deck_names", store_deck_names, ["incremental_update"], "Naming decks...")
+    # Les archétypes existants sont conservés : un nouveau deck qui relierait deux archétypes n'en fusionne aucun,
+    # seul un nouveau regroupement (--recluster) en tient compte
+    if recluster:
+        pipeline.add("deck_archetypes", rebuild_deck_archetypes, ["incremental_update"], "Clustering decks into archetypes...")
+    else:
+        pipeline.add("deck_archetypes", update_deck_archetypes, ["incremental_update"], "Assigning new decks to archetypes...")
+    pipeline.add("deck_search", sql_step("09_update_deck_search.sql"), ["deck_names"], "Indexing new decks for search...")
+    pipeline.add("publish_run", lambda: publish_run(True, steps), ["deck_search", "deck_archetypes"], "Publishing data version...")
+    return pipeline
+
+def main(incremental=False, steps=None, list_steps=False, recluster=False):
+    known_ids = get_ingested_tournament_ids() if incremental else None
+    if incremental and known_ids is None:
+        print("No complete transformation to update, running a full transformation...")
 
-        # Stocker les informations du deck dans la base de données
-        store_deck_info(deck_signature, formatted_cards, deck_name)
+    output_directory = get_absolute_path("../data_collection/output")
+    if known_ids is None:
+        pipeline = build_full_pipeline(output_directory, steps)
+    else:
+        pipeline = build_incremental_pipeline(output_directory, known_ids, steps, recluster)
+
+    if list_steps:
+        print("\n".join(pipeline.describe()))
+        return
+
+    try:
+        pipeline.run(steps)
+    finally:
+        print("Step timings:")
+        pipeline.report()
+        print("Statement timings:")
+        db.timings.report()
+        db.close()
 
     print("Data transformation completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Transformation des données collectées dans PostgreSQL")
+    parser.add_argument("--incremental", action="store_true", help="n'intègre que les tournois absents de la base et ne recalcule que les decks concernés")
+    parser.add_argument("--recluster", action="store_true", help="avec --incremental, regroupe à nouveau tous les decks en archétypes au lieu d'affecter les seuls nouveaux decks")
+    parser.add_argument("--step", action="append", dest="steps", metavar="STEP", help="n'exécute que cette étape et celles qui en dépendent (répétable)")
+    parser.add_argument("--list-steps", action="store_true", help="affiche les étapes et leurs dépendances")
+    parser.add_argument("--verbose", action="store_true", help="journalise la durée de chaque instruction SQL au moment où elle s'exécute")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    main(args.incremental, args.steps, args.list_steps, args.recluster)
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger("data_transformation.pipeline")
+
+@dataclass
+class Step:
+    """Étape de la transformation : une fonction sans argument, les étapes dont elle dépend et le message affiché à son lancement."""
+    name: str
+    run: Callable[[], None]
+    depends_on: tuple = ()
+    description: str = ""
+
+@dataclass
+class StepTiming:
+    started_at: float
+    duration: float = 0.0
+    status: str = "running"
+
+class Pipeline:
+    """Graphe de dépendances des étapes de la transformation. Les étapes dont toutes les dépendances sont terminées
+    s'exécutent en même temps, chacune dans son thread et avec ses propres connexions du pool."""
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.steps = {}
+        self.timings = {}
+        self.started_at = None
+        self.lock = threading.Lock()
+
+    def add(self, name, run, depends_on=(), description=""):
+        for dependency in depends_on:
+            if dependency not in self.steps:
+                raise ValueError(f"Étape {name} : dépendance inconnue {dependency} (les étapes sont déclarées dans l'ordre)")
+        self.steps[name] = Step(name, run, tuple(depends_on), description)
+
+    def dependents(self, names):
+        """Retourne les étapes demandées et toutes celles qui en dépendent, directement ou non."""
+        for name in names:
+            if name not in self.steps:
+                raise ValueError(f"Étape inconnue : {name} (étapes : {', '.join(self.steps)})")
+        selected = set(names)
+        # Les étapes sont déclarées après leurs dépendances, un seul parcours suffit
+        for step in self.steps.values():
+            if selected.intersection(step.depends_on):
+                selected.add(step.name)
+        return selected
+
+    def run(self, only=None):
+        """Exécute toutes les étapes, ou seulement celles de only et leurs dépendantes (leurs autres dépendances
+        étant supposées déjà construites). Une erreur arrête le lancement de nouvelles étapes ; la première est relevée
+        une fois les étapes en cours terminées."""
+        selected = self.dependents(only) if only else set(self.steps)
+        pending = {name: step for name, step in self.steps.items() if name in selected}
+        done = set(self.steps) - selected
+        running = {}
+        error = None
+        self.started_at = time.perf_counter()
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="step") as executor:
+            while pending or running:
+                if error is None:
+                    for name, step in list(pending.items()):
+                        if len(running) < self.max_workers and done.issuperset(step.depends_on):
+                            del pending[name]
+                            running[executor.submit(self.run_step, step)] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    else:
+                        done.add(name)
+
+        if error is not None:
+            raise error
+
+    def run_step(self, step):
+        if step.description:
+            print(step.description)
+        timing = StepTiming(time.perf_counter())
+        with self.lock:
+            self.timings[step.name] = timing
+        try:
+            step.run()
+            timing.status = "done"
+        except BaseException:
+            timing.status = "failed"
+            raise
+        finally:
+            timing.duration = time.perf_counter() - timing.started_at
+
+    def report(self):
+        """Journalise le début (relatif au lancement), la durée et l'état de chaque étape exécutée."""
+        logger.info("%10s %10s %8s  %s", "start s", "wall s", "status", "step")
+        for name, timing in sorted(self.timings.items(), key=lambda item: item[1].started_at):
+            logger.info("%10.2f %10.2f %8s  %s", timing.started_at - self.started_at, timing.duration, timing.status, name)
+
+    def describe(self):
+        """Liste les étapes avec leurs dépendances, dans l'ordre de déclaration."""
+        return [f"{step.name}" + (f"  <- {', '.join(step.depends_on)}" if step.depends_on else "") for step in self.steps.values()]
@@ -11,24 +11,291 @@ DB_PASSWORD = "1234"
 DB_HOST = "127.0.0.1"
 DB_PORT = "5432"
 
+# Ordre des versions de deck
+deck_version_order = ["A1", "A1a", "A2", "A2a", "A2b", "A3", "A3a"]
+
 @st.cache_resource
 def get_connection():
-    return psycopg.connect(
+    conn = psycopg.connect(
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?client_encoding=utf8"
     )
+    # Sans transaction ouverte entre deux lectures, la transformation peut recréer les tables lues par le tableau de bord
+    conn.autocommit = True
+    return conn
+
+def get_data_version():
+    """Dernière exécution publiée par la transformation (etl_runs), lue à chaque interaction : les données en cache
+    sont indexées par cette version et relues dès qu'une nouvelle exécution est publiée."""
+    conn = get_connection()
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('public.etl_runs') IS NOT NULL;")
+        if not cur.fetchone()[0]:
+            return None, None
+        cur.execute("SELECT run_id, finished_at FROM etl_runs ORDER BY run_id DESC LIMIT 1;")
+        return cur.fetchone() or (None, None)
+
+# Vue d'ensemble : filtres appliqués par la base, seules les lignes affichées sont transférées.
+# Les decks sans version ne sont retenus que si toutes les versions sont sélectionnées
+DECK_FILTER = """
+    games_played > %(min_games)s
+    AND (deck_version = ANY(%(versions)s) OR (%(all_versions)s AND deck_version IS NULL))
+"""
+DECK_PAGE_SIZE = 50
+
+# Graphiques : cartes principales affichées (les autres sont regroupées dans « Autres »), decks au plus dans le nuage
+# de points (les plus joués), et nombre de points au-delà duquel le rendu passe en WebGL
+CHART_TOP_CARDS = 20
+CHART_MAX_POINTS = 5000
+WEBGL_THRESHOLD = 1000
+OTHER_CARDS = "Autres"
+
+def deck_filter_params(min_games, versions):
+    return {"min_games": min_games, "versions": list(versions), "all_versions": len(versions) == len(deck_version_order)}
+
+@st.cache_data(max_entries=64)
+def count_filtered_decks(data_version, min_games, versions):
+    conn = get_connection()
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM wrk_deck_stats WHERE {DECK_FILTER};", deck_filter_params(min_games, versions))
+        return cur.fetchone()[0]
+
+@st.cache_data(max_entries=64)
+def load_deck_page(data_version, min_games, versions, page):
+    """Une page du tableau des decks, triée par version puis par nombre de parties."""
+    conn = get_connection()
+    params = deck_filter_params(min_games, versions)
+    params.update(order=deck_version_order, limit=DECK_PAGE_SIZE, offset=(page - 1) * DECK_PAGE_SIZE)
+    return pd.read_sql(
+        f"""
+        SELECT first_pokemon_card_name AS main_card, games_played, winrate, deck_version
+        FROM wrk_deck_stats
+        WHERE {DECK_FILTER}
+        ORDER BY array_position(%(order)s::text[], deck_version::text) NULLS LAST, games_played DESC, deck_id
+        LIMIT %(limit)s OFFSET %(offset)s;
+        """,
+        conn,
+        params=params
+    )
+
+@st.cache_data(max_entries=16)
+def load_filtered_decks(data_version, min_games, versions, top_n, max_points):
+    """Colonnes du nuage de points pour les max_points decks filtrés les plus joués, les cartes principales hors des
+    top_n plus jouées étant regroupées sous OTHER_CARDS."""
+    conn = get_connection()
+    params = deck_filter_params(min_games, versions)
+    params.update(top_n=top_n, max_points=max_points, other=OTHER_CARDS)
+    return pd.read_sql(
+        f"""
+        WITH decks AS (
+            SELECT first_pokemon_card_name AS main_card, deck_version, games_played, winrate
+            FROM wrk_deck_stats
+            WHERE {DECK_FILTER}
+        ),
+        top_cards AS (
+            SELECT main_card FROM decks WHERE main_card IS NOT NULL
+            GROUP BY main_card ORDER BY SUM(games_played) DESC LIMIT %(top_n)s
+        )
+        SELECT CASE WHEN main_card IN (SELECT main_card FROM top_cards) THEN main_card ELSE %(other)s END AS main_card,
+               deck_version, games_played, winrate
+        FROM decks
+        ORDER BY games_played DESC
+        LIMIT %(max_points)s;
+        """,
+        conn,
+        params=params
+    )
 
-# Chargement des données
-def load_deck_stats():
+@st.cache_data(max_entries=16)
+def load_usage_by_version(data_version, versions, top_n):
+    """Parties par carte principale et par version, agrégées par la base, les cartes hors des top_n plus jouées
+    étant regroupées sous OTHER_CARDS."""
     conn = get_connection()
-    return pd.read_sql("SELECT * FROM wrk_deck_stats;", conn)
+    return pd.read_sql(
+        """
+        WITH usage AS (
+            SELECT first_pokemon_card_name AS main_card, deck_version, SUM(games_played) AS games_played
+            FROM wrk_deck_stats
+            WHERE first_pokemon_card_name IS NOT NULL AND deck_version = ANY(%(versions)s)
+            GROUP BY first_pokemon_card_name, deck_version
+        ),
+        top_cards AS (
+            SELECT main_card FROM usage GROUP BY main_card ORDER BY SUM(games_played) DESC LIMIT %(top_n)s
+        )
+        SELECT CASE WHEN main_card IN (SELECT main_card FROM top_cards) THEN main_card ELSE %(other)s END AS main_card,
+               deck_version, SUM(games_played) AS games_played
+        FROM usage
+        GROUP BY 1, 2
+        ORDER BY array_position(%(order)s::text[], deck_version::text);
+        """,
+        conn,
+        params={"versions": list(versions), "top_n": top_n, "other": OTHER_CARDS, "order": deck_version_order}
+    )
 
-def load_first_pokemon():
+@st.cache_data(max_entries=16)
+def load_weekly_meta_share(data_version, versions, top_n):
+    """Part du métagame par semaine des top_n cartes principales les plus jouées, lue dans le cube du métagame
+    (02_analysis_metagame_cube.sql) : quelques lignes par semaine, quel que soit le nombre de parties."""
     conn = get_connection()
-    return pd.read_sql("SELECT * FROM wrk_deck_first_pokemon;", conn)
+    return pd.read_sql(
+        """
+        WITH weekly AS (
+            SELECT week, main_card, SUM(games_played) AS games_played, SUM(wins) AS wins
+            FROM wrk_metagame_cube
+            WHERE week IS NOT NULL AND deck_version = ANY(%(versions)s)
+            GROUP BY week, main_card
+        ),
+        top_cards AS (
+            SELECT main_card FROM weekly WHERE main_card IS NOT NULL
+            GROUP BY main_card ORDER BY SUM(games_played) DESC LIMIT %(top_n)s
+        )
+        SELECT w.week, w.main_card, w.games_played,
+               ROUND(w.wins * 100.0 / w.games_played, 2) AS winrate,
+               ROUND(w.games_played * 100.0 / t.total, 2) AS meta_share
+        FROM weekly w
+        JOIN (SELECT week, SUM(games_played) AS total FROM weekly GROUP BY week) t ON t.week = w.week
+        WHERE w.main_card IN (SELECT main_card FROM top_cards)
+        ORDER BY w.week, w.main_card;
+        """,
+        conn,
+        params={"versions": list(versions), "top_n": top_n}
+    )
+
+@st.cache_data(max_entries=16)
+def load_archetype_matchups(data_version, min_games, versions, top_n, min_matchup_games):
+    """Confrontations entre les top_n cartes principales les plus jouées parmi les decks filtrés, sommées sur les
+    confrontations des decks filtrés (wrk_deck_matchups) : wrk_archetype_matchups compte les decks de toutes les versions.
+    Comme le winrate d'un deck, celui d'une case compte tous les decks adverses de la carte principale en colonne."""
+    conn = get_connection()
+    params = deck_filter_params(min_games, versions)
+    params.update(top_n=top_n, min_matchup_games=min_matchup_games)
+    return pd.read_sql(
+        f"""
+        WITH filtered_decks AS (
+            SELECT deck_id, first_pokemon_card_name AS main_card, games_played
+            FROM wrk_deck_stats
+            WHERE first_pokemon_card_name IS NOT NULL AND {DECK_FILTER}
+        ),
+        top_cards AS (
+            SELECT main_card
+            FROM filtered_decks
+            GROUP BY main_card
+            ORDER BY SUM(games_played) DESC
+            LIMIT %(top_n)s
+        ),
+        top_decks AS (
+            SELECT deck_id, main_card
+            FROM filtered_decks
+            WHERE main_card IN (SELECT main_card FROM top_cards)
+        )
+        SELECT d.main_card, o.first_pokemon_card_name AS opponent_main_card,
+               ROUND(SUM(m.wins) * 100.0 / SUM(m.games_played), 2) AS winrate
+        FROM wrk_deck_matchups m
+        JOIN top_decks d ON d.deck_id = m.deck_id
+        JOIN wrk_deck_stats o ON o.deck_id = m.opponent_deck_id
+        WHERE o.first_pokemon_card_name IN (SELECT main_card FROM top_cards)
+        GROUP BY d.main_card, o.first_pokemon_card_name
+        HAVING SUM(m.games_played) >= %(min_matchup_games)s;
+        """,
+        conn,
+        params=params
+    )
+
+# Étude d'un deck : recherche par préfixe dans l'index deck_search_terms (09_create_deck_search.sql),
+# puis détail du seul deck choisi, lu par des requêtes indexées sur deck_id
+SEARCH_RESULTS = 20
+
+@st.cache_data(max_entries=256)
+def search_words(data_version, query):
+    """Mots de la recherche, découpés et mis en minuscules par la base avec la fonction qui découpe les mots de l'index."""
+    conn = get_connection()
+    with conn.cursor() as cur:
+        cur.execute("SELECT word FROM deck_search_words(%s) AS word ORDER BY word;", (query,))
+        return tuple(word for word, in cur.fetchall())
+
+@st.cache_data(max_entries=256)
+def search_decks(data_version, words, limit):
+    """Decks dont chaque mot de la recherche commence un mot du nom, de la carte principale ou d'une carte,
+    les plus joués d'abord ; sans mot, les decks les plus joués."""
+    conn = get_connection()
+    # Un motif constant par mot, pour que la recherche par préfixe passe par l'index
+    matches = " INTERSECT ".join(["SELECT deck_id FROM deck_search_terms WHERE term LIKE %s"] * len(words))
+    where = f"WHERE deck_id IN ({matches})" if words else ""
+    return pd.read_sql(
+        f"""
+        SELECT deck_id, deck_name, main_card, deck_version, games_played, winrate
+        FROM deck_search
+        {where}
+        ORDER BY games_played DESC, deck_id
+        LIMIT %s;
+        """,
+        conn,
+        params=[word + "%" for word in words] + [limit]
+    )
 
-def load_decklists():
+@st.cache_data(max_entries=256)
+def load_deck_details(data_version, deck_id):
     conn = get_connection()
-    return pd.read_sql("SELECT * FROM wrk_deck_versions;", conn)
+    return pd.read_sql(
+        """
+        SELECT s.deck_id, s.deck_name, s.main_card, s.deck_version, st.games_played, st.wins, st.losses, st.winrate
+        FROM deck_search s
+        JOIN wrk_deck_stats st ON st.deck_id = s.deck_id
+        WHERE s.deck_id = %s;
+        """,
+        conn,
+        params=(deck_id,)
+    ).iloc[0]
+
+@st.cache_data(max_entries=256)
+def load_deck_cards(data_version, deck_id):
+    """Cartes d'un deck, lues dans la liste d'un des joueurs qui l'ont joué (tous ont les mêmes cartes)."""
+    conn = get_connection()
+    return pd.read_sql(
+        """
+        SELECT l.card_type, l.card_name, l.card_count
+        FROM (SELECT tournament_id, player_id FROM wrk_player_decks WHERE deck_id = %s LIMIT 1) p
+        JOIN wrk_decklists l ON l.tournament_id = p.tournament_id AND l.player_id = p.player_id
+        ORDER BY l.card_type, l.card_name;
+        """,
+        conn,
+        params=(deck_id,)
+    )
+
+@st.cache_data(max_entries=256)
+def load_deck_winrate_history(data_version, deck_id):
+    """Parties et taux de victoire d'un deck par semaine, lus dans les faits des matchs de l'entrepôt."""
+    conn = get_connection()
+    return pd.read_sql(
+        """
+        SELECT date_trunc('week', t.tournament_date)::date AS week,
+               COUNT(*) AS games_played,
+               ROUND(SUM(CASE WHEN f.score = 2 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS winrate
+        FROM fact_matches f
+        JOIN dim_tournament t ON t.tournament_key = f.tournament_key
+        WHERE f.deck_id = %s AND t.tournament_date IS NOT NULL
+        GROUP BY 1
+        ORDER BY 1;
+        """,
+        conn,
+        params=(deck_id,)
+    )
+
+@st.cache_data(max_entries=256)
+def load_deck_matchups(data_version, deck_id):
+    # Matrice précalculée par la transformation (02_analysis_deck_matchups.sql), lue par sa clé primaire
+    conn = get_connection()
+    return pd.read_sql(
+        """
+        SELECT x.opponent_deck_id, f.first_pokemon_card_name AS opponent_main_card,
+               x.games_played, x.wins, x.losses, x.winrate
+        FROM wrk_deck_matchups x
+        LEFT JOIN wrk_deck_first_pokemon f ON f.deck_id = x.opponent_deck_id
+        WHERE x.deck_id = %s
+        ORDER BY x.games_played DESC;
+        """,
+        conn,
+        params=(deck_id,)
+    )
 
 # App Streamlit
 st.set_page_config(page_title="Pokémon TCG Pocket - Metagame", layout="wide")
@@ -36,100 +303,181 @@ st.title("📊 Pokémon TCG Pocket - Analyse du Metagame")
 
 tab1, tab2 = st.tabs(["🏆 Vue d'ensemble", "🔬 Étude d’un deck"])
 
-# Chargement des datasets
-df_stats = load_deck_stats()
-df_first = load_first_pokemon()
-df_decklists = load_decklists()
-
-# Fusion avec la première carte Pokémon
-df_merged = df_stats.merge(df_first, on="deck_signature", how="left")
-
-# Gestion de la colonne principale
-if "first_pokemon_card_name" in df_merged.columns:
-    df_merged["main_card"] = df_merged["first_pokemon_card_name"]
-elif "first_pokemon_card_name_y" in df_merged.columns:
-    df_merged["main_card"] = df_merged["first_pokemon_card_name_y"]
-elif "card_name" in df_merged.columns:
-    df_merged["main_card"] = df_merged["card_name"]
-else:
-    st.error("⚠️ La colonne contenant la carte principale n'a pas été trouvée.")
-    df_merged["main_card"] = "inconnue"
-
-# Convertir les versions de deck en catégories ordonnées
-deck_version_order = ["A1", "A1a", "A2", "A2a", "A2b", "A3", "A3a"]
-df_merged["deck_version"] = pd.Categorical(df_merged["deck_version"], categories=deck_version_order, ordered=True)
+# Version des données : les requêtes en cache sont relues après une nouvelle exécution de la transformation
+data_version, data_published_at = get_data_version()
+if data_published_at is not None:
+    st.caption(f"Données de la transformation n°{data_version} du {data_published_at:%d/%m/%Y %H:%M}")
 
 # Tab 1 : Vue d'ensemble
 with tab1:
+    filter_games, filter_versions = st.columns(2)
+    min_games = filter_games.slider("Nombre minimum de parties :", 0, 500, 50, step=10)
+    first_version, last_version = filter_versions.select_slider(
+        "Versions :", options=deck_version_order, value=(deck_version_order[0], deck_version_order[-1])
+    )
+    versions = tuple(deck_version_order[deck_version_order.index(first_version):deck_version_order.index(last_version) + 1])
+
     st.subheader("📋 Tableau des decks")
-    df_filtered = df_merged[df_merged["games_played"] > 50]
-    df_filtered = df_filtered.sort_values("deck_version")
-    st.dataframe(df_filtered[["main_card", "games_played", "winrate", "deck_version"]])
+    nb_decks = count_filtered_decks(data_version, min_games, versions)
+    nb_pages = max(1, -(-nb_decks // DECK_PAGE_SIZE))
+    page = st.number_input(f"Page (sur {nb_pages}, {nb_decks} decks) :", min_value=1, max_value=nb_pages, value=1)
+    st.dataframe(load_deck_page(data_version, min_games, versions, page))
+
+    df_filtered = load_filtered_decks(data_version, min_games, versions, CHART_TOP_CARDS, CHART_MAX_POINTS)
 
     st.subheader("🎯 Nuage de points : Winrate par version")
-    fig1 = px.scatter(
-        df_filtered,
-        x="deck_version",
-        y="winrate",
-        size="games_played",
-        color="main_card",
-        hover_name="main_card",
-        title=" ",
-        labels={
-            "winrate": "Taux de victoire (%)",
-            "deck_version": "Version",
-            "main_card": "Carte principale",
-            "games_played": "Nombre de parties"
-        },
-        size_max=80,
-        height=600,
-        width=1200,
-        category_orders={"deck_version": deck_version_order}
-    )
-    fig1.update_layout(
-        title_font_size=20,
-        legend_title="Carte principale",
-        legend=dict(itemsizing='constant', font=dict(size=12)),
-        xaxis=dict(title_font=dict(size=16), tickfont=dict(size=14)),
-        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=14)),
-        margin=dict(l=40, r=40, t=60, b=40)
-    )
-    st.plotly_chart(fig1, use_container_width=False)
+    if df_filtered.empty:
+        st.info("Aucun deck ne correspond à ces filtres.")
+    else:
+        fig1 = px.scatter(
+            df_filtered,
+            x="deck_version",
+            y="winrate",
+            size="games_played",
+            color="main_card",
+            hover_name="main_card",
+            title=" ",
+            labels={
+                "winrate": "Taux de victoire (%)",
+                "deck_version": "Version",
+                "main_card": "Carte principale",
+                "games_played": "Nombre de parties"
+            },
+            size_max=80,
+            height=600,
+            width=1200,
+            category_orders={"deck_version": deck_version_order},
+            render_mode="webgl" if len(df_filtered) > WEBGL_THRESHOLD else "svg"
+        )
+        fig1.update_layout(
+            title_font_size=20,
+            legend_title="Carte principale",
+            legend=dict(itemsizing='constant', font=dict(size=12)),
+            xaxis=dict(title_font=dict(size=16), tickfont=dict(size=14)),
+            yaxis=dict(title_font=dict(size=16), tickfont=dict(size=14)),
+            margin=dict(l=40, r=40, t=60, b=40)
+        )
+        st.plotly_chart(fig1, use_container_width=False)
+        if nb_decks > len(df_filtered):
+            st.caption(f"Les {len(df_filtered)} decks les plus joués sur {nb_decks} sont affichés.")
 
     st.subheader("📈 Courbe : Nombre d'utilisations des decks par version")
-    usage_data = df_merged.groupby(["main_card", "deck_version"]).agg({"games_played": "sum"}).reset_index()
-    usage_data = usage_data.sort_values("deck_version")
-
-    fig2 = go.Figure()
-    for card in usage_data["main_card"].unique():
-        subset = usage_data[usage_data["main_card"] == card]
-        fig2.add_trace(go.Scatter(
-            x=subset["deck_version"],
-            y=subset["games_played"],
-            mode='lines+markers',
-            name=card
-        ))
-
-    fig2.update_layout(
-        title="",
-        xaxis_title="Version de deck",
-        yaxis_title="Nombre de parties",
-        height=600,
-        width=1200,
-        xaxis={'categoryorder':'array', 'categoryarray':deck_version_order}
-    )
-    st.plotly_chart(fig2, use_container_width=False)
+    usage_data = load_usage_by_version(data_version, versions, CHART_TOP_CARDS)
+
+    if usage_data.empty:
+        st.info("Aucune partie pour ces versions.")
+    else:
+        # Une trace par carte, tirée d'un seul regroupement
+        trace_type = go.Scattergl if len(usage_data) > WEBGL_THRESHOLD else go.Scatter
+        fig2 = go.Figure()
+        for card, subset in usage_data.groupby("main_card", sort=False):
+            fig2.add_trace(trace_type(
+                x=subset["deck_version"],
+                y=subset["games_played"],
+                mode='lines+markers',
+                name=card
+            ))
+
+        fig2.update_layout(
+            title="",
+            xaxis_title="Version de deck",
+            yaxis_title="Nombre de parties",
+            height=600,
+            width=1200,
+            xaxis={'categoryorder':'array', 'categoryarray':deck_version_order}
+        )
+        st.plotly_chart(fig2, use_container_width=False)
+
+    st.subheader("📅 Part du métagame par semaine")
+    df_weekly = load_weekly_meta_share(data_version, versions, 10)
+    if df_weekly.empty:
+        st.info("Aucune partie pour ces versions.")
+    else:
+        fig_weekly = px.line(
+            df_weekly,
+            x="week",
+            y="meta_share",
+            color="main_card",
+            markers=True,
+            hover_data=["games_played", "winrate"],
+            labels={
+                "week": "Semaine",
+                "meta_share": "Part du métagame (%)",
+                "main_card": "Carte principale",
+                "games_played": "Nombre de parties",
+                "winrate": "Taux de victoire (%)"
+            },
+            height=600,
+            width=1200
+        )
+        st.plotly_chart(fig_weekly, use_container_width=False)
+
+    st.subheader("⚔️ Matrice des confrontations entre archétypes")
+    df_matchups = load_archetype_matchups(data_version, min_games, versions, 15, 50)
+    if df_matchups.empty:
+        st.info("Aucune confrontation entre archétypes ne correspond à ces filtres.")
+    else:
+        matrix = df_matchups.pivot(index="main_card", columns="opponent_main_card", values="winrate")
+        fig3 = px.imshow(
+            matrix,
+            text_auto=True,
+            color_continuous_scale="RdYlGn",
+            zmin=0,
+            zmax=100,
+            labels={"x": "Archétype adverse", "y": "Archétype", "color": "Taux de victoire (%)"},
+            height=700,
+            width=1200
+        )
+        st.plotly_chart(fig3, use_container_width=False)
 
 # Tab 2 : Étude d’un deck
 with tab2:
     st.subheader("🔍 Analyse détaillée d’un deck")
 
-    selected_signature = st.selectbox("Choisis un deck :", df_merged["deck_signature"].unique())
-    deck_info = df_merged[df_merged["deck_signature"] == selected_signature].iloc[0]
+    query = st.text_input("Rechercher un deck (nom, carte principale ou carte du deck) :", placeholder="ex. : charizard a1")
+    df_results = search_decks(data_version, search_words(data_version, query), SEARCH_RESULTS)
+    if df_results.empty:
+        st.info("Aucun deck ne correspond à cette recherche.")
+        st.stop()
+
+    result_labels = {
+        int(row.deck_id): f"{row.deck_name or row.main_card} ({row.deck_version}, {row.games_played} parties)"
+        for row in df_results.itertuples()
+    }
+    selected_deck_id = st.selectbox(
+        f"Choisis un deck ({len(df_results)} plus joués parmi les résultats) :",
+        list(result_labels),
+        format_func=result_labels.get
+    )
+    deck_info = load_deck_details(data_version, selected_deck_id)
 
-    st.markdown(f"### 🧬 Détails du deck `{selected_signature}`")
+    st.markdown(f"### 🧬 Détails du deck `{deck_info['deck_name'] or deck_info['deck_id']}`")
     st.markdown(f"- **Carte principale** : {deck_info['main_card']}")
     st.markdown(f"- **Total de parties jouées** : {deck_info['games_played']}")
     st.markdown(f"- **Winrate** : {deck_info['winrate']} %")
     st.markdown(f"- **Version** : {deck_info['deck_version']}")
 
+    st.markdown("#### 🃏 Cartes")
+    st.dataframe(load_deck_cards(data_version, selected_deck_id))
+
+    st.markdown("#### 📈 Taux de victoire par semaine")
+    df_history = load_deck_winrate_history(data_version, selected_deck_id)
+    if df_history.empty:
+        st.info("Aucune partie datée pour ce deck.")
+    else:
+        fig_history = px.line(
+            df_history,
+            x="week",
+            y="winrate",
+            markers=True,
+            hover_data=["games_played"],
+            labels={"week": "Semaine", "winrate": "Taux de victoire (%)", "games_played": "Nombre de parties"},
+            height=400,
+            width=1200
+        )
+        st.plotly_chart(fig_history, use_container_width=False)
+
+    st.markdown("#### ⚔️ Confrontations")
+    df_deck_matchups = load_deck_matchups(data_version, selected_deck_id)
+    st.dataframe(df_deck_matchups[["opponent_main_card", "games_played", "wins", "losses", "winrate"]])
+
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The collection scripts import their sibling modules directly, as when run from data_collection/.
+# benchmarks/replay_server.py renders the HTML fixtures of benchmarks/fixtures into pages
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_dir, "data_collection"))
+sys.path.insert(0, os.path.join(project_dir, "benchmarks"))
+
+# data_collection/main.py only opens its cache and starts its parser pool in main(): imported here,
+# it parses on the event loop and the tests give it a cache of their own
+@pytest.fixture(scope="session")
+def crawler():
+    import main
+    return main
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from cache_store import CachePolicy, PackCache
+
+ETAG = '"v1"'
+PAGE = "<html><body>tournaments</body></html>"
+
+def test_evict_keeps_validators_of_expired_pages(tmp_path):
+    cache = PackCache(str(tmp_path))
+    policies = {"tournament_list": CachePolicy(ttl=3600)}
+    cache.put("https://example.com/with-etag", PAGE, "tournament_list", etag=ETAG)
+    cache.put("https://example.com/without-validators", PAGE, "tournament_list")
+    cache.index.execute("UPDATE pages SET fetched_at = ?", (time.time() - 24 * 3600,))
+
+    cache.evict(policies)
+
+    assert cache.get("https://example.com/with-etag", policies["tournament_list"]) is None
+    assert cache.validators("https://example.com/with-etag") == (ETAG, None)
+    assert cache.validators("https://example.com/without-validators") == (None, None)
+
+    # Past the stale grace, the page and its validators are dropped
+    cache.index.execute("UPDATE pages SET fetched_at = ?", (time.time() - 3600 - policies["tournament_list"].stale_grace - 60,))
+    cache.evict(policies)
+    assert cache.validators("https://example.com/with-etag") == (None, None)
+    cache.close()
+
+def test_expired_listing_is_revalidated_with_304(crawler, tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, "page_cache", PackCache(str(tmp_path / "cache")))
+    requests = []
+
+    async def tournament_list(request):
+        requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(text=PAGE, content_type="text/html", headers={"ETag": ETAG})
+
+    async def crawl_twice():
+        app = web.Application()
+        app.router.add_get("/tournaments/completed", tournament_list)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/tournaments/completed"
+        try:
+            async with aiohttp.ClientSession() as session:
+                sem = asyncio.Semaphore(1)
+                first = await crawler.async_html_from_url(session, sem, url)
+
+                # The next day: the listing is past its one hour TTL and the crawler evicts at startup
+                crawler.page_cache.index.execute("UPDATE pages SET fetched_at = ?", (time.time() - 24 * 3600,))
+                crawler.page_cache.evict(crawler.cache_policies, crawler.cache_max_size)
+
+                second = await crawler.async_html_from_url(session, sem, url)
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    first, second = asyncio.run(crawl_twice())
+
+    assert first == second == PAGE
+    assert requests == [None, ETAG]
+    crawler.page_cache.close()
+
+def test_uncached_page_type_is_not_stored(crawler, tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, "page_cache", PackCache(str(tmp_path / "cache")))
+    requests = []
+
+    async def about(request):
+        requests.append(request.path)
+        return web.Response(text=PAGE, content_type="text/html", headers={"ETag": ETAG})
+
+    async def fetch_twice():
+        app = web.Application()
+        app.router.add_get("/about", about)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/about"
+        try:
+            async with aiohttp.ClientSession() as session:
+                sem = asyncio.Semaphore(1)
+                pages = [await crawler.async_html_from_url(session, sem, url) for _ in range(2)]
+        finally:
+            await runner.cleanup()
+        return url, pages
+
+    url, pages = asyncio.run(fetch_twice())
+
+    assert pages == [PAGE, PAGE] and len(requests) == 2
+    assert crawler.page_cache.validators(url) == (None, None)
+    assert crawler.page_cache.index.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 0
+    crawler.page_cache.close()
@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+import aiohttp
+from aiohttp import web
+
+import replay_server
+from cache_store import PackCache
+from crawl_journal import CrawlJournal
+from output_writer import JsonOutput
+
+# A tournament listed on the second page fails during a full crawl; the next incremental crawl stops
+# at the first page, where every tournament is known, and must still retry it
+def test_failed_tournament_is_retried_by_incremental_crawl(crawler, tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, "page_cache", PackCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(crawler, "crawl_state_file", str(tmp_path / "crawl_state.json"))
+    journal_file = str(tmp_path / "crawl_journal.jsonl")
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    failing_id = replay_server.tournament_id(2, 3)
+    failing = {"enabled": True}
+    standings_requests = []
+
+    @web.middleware
+    async def fail_standings(request, handler):
+        if request.path == f"/tournament/{failing_id}/standings":
+            standings_requests.append(failing["enabled"])
+            if failing["enabled"]:
+                return web.Response(status=404)
+        return await handler(request)
+
+    async def crawl(incremental):
+        app = replay_server.create_app(replay_server.ReplayConfig(scale=2))
+        app.middlewares.append(fail_standings)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        journal = CrawlJournal(journal_file)
+        try:
+            async with aiohttp.ClientSession(base_url=f"http://127.0.0.1:{runner.addresses[0][1]}") as session:
+                await crawler.handle_tournament_list_pages(
+                    session, asyncio.Semaphore(4), JsonOutput(str(output_dir)), crawler.load_crawl_state(), journal, incremental
+                )
+        finally:
+            journal.close()
+            await runner.cleanup()
+
+    asyncio.run(crawl(False))
+    assert not os.path.isfile(output_dir / f"{failing_id}.json")
+    assert list(crawler.load_crawl_state().failed) == [failing_id]
+
+    failing["enabled"] = False
+    asyncio.run(crawl(True))
+    assert os.path.isfile(output_dir / f"{failing_id}.json")
+    assert standings_requests == [True, False]
+    state = crawler.load_crawl_state()
+    assert state.failed == {} and failing_id in state.known_ids
+    crawler.page_cache.close()
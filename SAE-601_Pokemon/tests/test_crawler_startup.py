@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+from conftest import project_dir
+
+# Parser workers started by spawn or forkserver re-import main.py: the import must not touch the disk nor start processes
+def test_import_has_no_side_effects(tmp_path):
+    code = "import multiprocessing, main; assert not multiprocessing.active_children()"
+    env = {**os.environ, "PYTHONPATH": os.path.join(project_dir, "data_collection")}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,72 @@
+from dataclasses import fields, is_dataclass
+
+import pytest
+
+import html_parsing
+import replay_server
+
+config = replay_server.ReplayConfig()
+tournaments = [replay_server.tournament_id(1, index) for index in range(3)]
+
+# Parsing before the lxml change: Python's html.parser on the whole page, no SoupStrainer
+@pytest.fixture
+def parse_both(monkeypatch):
+    def parse(parser, *args):
+        assert html_parsing.parser_backend == "lxml", "the parity tests compare lxml with html.parser"
+        new = parser(*args)
+        monkeypatch.setattr(html_parsing, "parser_backend", "html.parser")
+        monkeypatch.setattr(html_parsing, "page_strainers", {})
+        old = parser(*args)
+        monkeypatch.undo()
+        return old, new
+    return parse
+
+# Compare dataclasses (and lists, tuples or dicts of them) field by field, for a readable failure
+def assert_same(old, new, path="result"):
+    assert type(old) is type(new), path
+    if is_dataclass(old):
+        for field in fields(old):
+            assert_same(getattr(old, field.name), getattr(new, field.name), f"{path}.{field.name}")
+    elif isinstance(old, (list, tuple)):
+        assert len(old) == len(new), f"{path}: {len(old)} != {len(new)} items"
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            assert_same(old_item, new_item, f"{path}[{i}]")
+    elif isinstance(old, dict):
+        assert old.keys() == new.keys(), path
+        for key in old:
+            assert_same(old[key], new[key], f"{path}[{key!r}]")
+    else:
+        assert old == new, path
+
+@pytest.mark.parametrize("page", [1, 2])
+def test_tournament_list_parity(crawler, parse_both, page):
+    old, new = parse_both(crawler.parse_tournament_list_page, replay_server.tournament_list_page(replay_server.ReplayConfig(scale=2), page))
+    assert old[:2] == (page, 2) and len(old[2]) == config.tournaments_per_page
+    assert_same(old, new)
+
+@pytest.mark.parametrize("tournament", tournaments)
+def test_standings_parity(crawler, parse_both, tournament):
+    old, new = parse_both(crawler.parse_standings_page, replay_server.standings_page(config, tournament))
+    assert len(old) == config.players_per_tournament
+    assert_same(old, new)
+
+@pytest.mark.parametrize("tournament", tournaments)
+@pytest.mark.parametrize("player_id", ["p1", "p2", "p9"])
+def test_decklist_parity(crawler, parse_both, tournament, player_id):
+    old, new = parse_both(crawler.parse_decklist_page, replay_server.decklist_page(config, tournament, player_id))
+    assert len(old) > 0
+    assert_same(old, new)
+
+@pytest.mark.parametrize("tournament", tournaments)
+@pytest.mark.parametrize("round_number", [None, 1, config.swiss_rounds])
+def test_matches_parity(crawler, parse_both, tournament, round_number):
+    old, new = parse_both(crawler.parse_pairings_page, replay_server.pairings_page(config, tournament, round_number))
+    assert len(old[1]) > 0
+    assert_same(old, new)
+
+@pytest.mark.parametrize("number", [1, 2, 3, 4, 6])
+def test_card_parity(crawler, parse_both, number):
+    card_url = f"/cards/A1/{number}"
+    old, new = parse_both(crawler.parse_card_info, replay_server.card_page("A1", number), card_url)
+    assert old is not None and old.get("name")
+    assert_same(old, new)
@@ -0,0 +1,43 @@
+import pyarrow.parquet as pq
+
+import parquet_output
+
+def test_missing_placing_is_stored_as_null(crawler, tmp_path):
+    output = parquet_output.ParquetOutput(str(tmp_path))
+    tournament = crawler.Tournament("t1", "Cup", "2025-03-01T18:00:00.000Z", "Organizer", "standard", "", [], [])
+    with output.writer(tournament) as writer:
+        for placing in ("1", "", None, -1):
+            writer.write_player(crawler.Player(f"p{placing}", "Player", placing, "FR", []))
+    output.close()
+
+    players = pq.read_table(tmp_path / "parquet" / "players").column("placing").to_pylist()
+    tournaments = pq.read_table(tmp_path / "parquet" / "tournaments").column("nb_players").to_pylist()
+    assert players == [1, None, None, -1]
+    assert tournaments == [None]
+
+def test_rows_are_written_in_bounded_batches(crawler, tmp_path, monkeypatch):
+    monkeypatch.setattr(parquet_output, "parquet_batch_rows", 4)
+    output = parquet_output.ParquetOutput(str(tmp_path))
+    tournament = crawler.Tournament("t1", "Cup", "2025-03-01T18:00:00.000Z", "Organizer", "standard", "10", [], [])
+    decklist = [crawler.DeckListItem("Pokémon", f"/cards/A1/{number}", f"Card {number}", 2) for number in range(3)]
+    with output.writer(tournament) as writer:
+        for placing in range(1, 11):
+            writer.write_player(crawler.Player(f"p{placing}", "Player", str(placing), "FR", decklist))
+            assert all(len(columns["tournament_id"]) < 4 for columns in writer.columns.values())
+
+    part = pq.ParquetFile(tmp_path / "parquet" / "decklists" / "t1.parquet")
+    assert part.metadata.num_rows == 30 and part.metadata.num_row_groups == 8
+    assert pq.read_table(tmp_path / "parquet" / "players" / "t1.parquet").column("placing").to_pylist() == list(range(1, 11))
+
+def test_failed_tournament_leaves_no_part(crawler, tmp_path):
+    output = parquet_output.ParquetOutput(str(tmp_path))
+    tournament = crawler.Tournament("t1", "Cup", "2025-03-01T18:00:00.000Z", "Organizer", "standard", "10", [], [])
+    try:
+        with output.writer(tournament) as writer:
+            writer.write_player(crawler.Player("p1", "Player", "1", "FR", []))
+            raise RuntimeError("pairings page unreachable")
+    except RuntimeError:
+        pass
+
+    assert not output.contains("t1")
+    assert [path for path in tmp_path.rglob("*") if path.is_file()] == []